@@ -1,38 +1,28 @@
-import json
-import nltk
-from collections import Counter
-import re
-import requests
-
-
-# ---------- Load and Analyze Your Subreddit Data ----------
-with open('subreddit_data.json', 'r', encoding='utf-8') as f:
-    posts = json.load(f)
-
-titles = [post.get('title', '') for post in posts]
-bodies = [post.get('body', '') for post in posts]
-
-# Basic stats for style analysis
-all_titles_text = ' '.join(titles)
-tokens = nltk.word_tokenize(all_titles_text.lower())
-bigrams = Counter(nltk.bigrams(tokens))
-most_common_bigrams = bigrams.most_common(10)
-avg_title_length = sum(len(t.split()) for t in titles if t) / len(titles)
-avg_body_length = sum(len(b.split()) for b in bodies if b) / max(len(bodies), 1)
-stop_words = set(nltk.corpus.stopwords.words('english'))
-title_words = [w for w in tokens if w.isalpha() and w not in stop_words]
-top_words = Counter(title_words).most_common(10)
-questions = [t for t in titles if '?' in t]
-has_bullets = sum(1 for b in bodies if re.search(r"^\s*[-*]", b, re.MULTILINE))
-
-summary_stats = f"""
-- Average title length: {avg_title_length:.1f} words
-- Average body length: {avg_body_length:.1f} words
-- Most common bigrams in titles: {most_common_bigrams}
-- Most common words: {top_words}
-- About {len(questions)}/{len(titles)} titles include a question
-- {has_bullets} posts have bullet-point lists in body
-"""
+import sys
+
+from generation_backends import create_backend
+from generation_cache import GenerationCache
+from ollama_client import OLLAMA_URL
+from style_stats import analyze_file
+
+
+DATA_PATH = 'subreddit_data.json'  # JSON, JSONL or columnar (.cols) output from postscraper.py
+
+# Generation backend: "ollama" (OLLAMA_URL) or "recorded" (replays RECORDING_PATH)
+GENERATION_BACKEND = "ollama"
+GENERATION_MODEL = "llama3"
+RECORDING_PATH = "generation_recording.json"
+
+# Batch mode: one prompt per subreddit, e.g. {"SaaS": "scraped/SaaS.json"} from
+# postscraper's batch mode. Generations run GENERATION_PARALLELISM at a time.
+SUBREDDIT_FILES = {}
+GENERATION_PARALLELISM = 4
+
+# Reuse completions for an unchanged model/options/prompt (.cache/generations.sqlite)
+USE_GENERATION_CACHE = True
+FORCE_REGENERATE = False  # Ignore cached completions for this run
+# Evaluate the customer context block once and reuse its Ollama context
+REUSE_PREFIX_CONTEXT = True
 
 # ---------- Brand and Customer Context ----------
 subreddit_name = "YourSubreddit"
@@ -43,15 +33,22 @@ product = "your product here"
 customer_goals = "Crustdata is used by customers who are mostly building products rather than running manual workflows—AI SDR tools, recruiting platforms, investor tools, CRM/data teams, and AI agent platforms. AI outbound teams use it to discover new accounts and contacts that match an ICP, detect buying signals in real time (funding, hiring, traffic, posts, reviews), personalize outreach with up-to-date titles and companies, and replace messy stacks of Apollo/Clearbit/LinkedIn scrapers with one API-first data layer. Recruiting platforms use it to power sourcing tools that detect when candidates change jobs, update skills, become poachable, or show intent, and to track hiring trends so they can instantly refresh talent databases. Investors and deal-sourcing platforms use Crustdata to find early-stage companies before they’re widely known, score them using headcount growth, funding, traffic, hiring, reviews, and posts, and monitor portfolios for risk or follow-ons via live signals. Internal sales ops and CRM teams use it to turn “CRM graveyards” into real-time systems of record by enriching and deduping contacts and accounts, pushing watcher signals into CRMs, and removing dependence on multiple enrichment vendors. AI/LLM agent platforms use Crustdata as a structured gateway to the internet so agents can fetch people, company, and signal data without building brittle scrapers or relying on unstructured consumer web search. The main pain points across all these customers are stale data (legacy vendors refresh monthly, missing job changes and new founders entirely), fragmented vendor stacks (one tool for firmographics, another for emails, another for jobs, etc.), lack of real-time event detection (“tell me the second a VP Sales posts about outbound”), missing or shallow data types (most vendors don’t provide posts, reactors, job descriptions, start/end dates, skills, traffic, reviews, technographics), and the burden of maintaining their own scrapers and infrastructure. Many also struggle with poor developer experience from competitors—docs not readable by LLMs, hard-to-use schemas, slow support, and unpredictable credit-based pricing. Competitors fall into a few categories. Static dataset players like Coresignal and People Data Labs offer massive but mostly monthly-refreshed databases with no real-time search or webhook-driven events. Enrichment/contact tools like Clearbit, Apollo, and Lusha focus on manual sales teams, not product teams or agents, and mainly offer firmographics + contact info rather than posts, reactors, reviews, traffic, news, and multi-source intelligence. LinkedIn-focused vendors like Proxycurl and MixRank enrich profiles but don’t cover Crustdata’s full scope—multi-source company profiles from 15–16+ sources, social posts + reactors, reviews, news, traffic, and event-driven Watcher APIs. Many prospects also compare Crustdata to “DIY scraping,” but switch because Crustdata eliminates crawling, parsing, maintenance, and compliance headaches. Crustdata’s core differentiators are real-time enrichment instead of monthly refresh, real-time search APIs instead of static datasets, multi-source breadth (posts, reactors, traffic, reviews, technographics, jobs, news), structured APIs built for AI agents, and webhook-driven Watcher events that let customers detect changes as they happen. Overall, Crustdata positions itself not as a traditional data vendor but as a real-time B2B data layer for AI-native products—combining real-time search, live enrichment, event-based signals, and multi-source intelligence so AI SDRs, recruiters, investors, and internal tools can act on what’s happening right now, not last month."
 
 # ---------- Enhanced Prompt with Customer Goals ----------
-ollama_prompt = f"""
+# The customer context leads the prompt so it is a prefix shared by every
+# subreddit; Ollama evaluates it once and reuses the returned context.
+def build_prompt_prefix(customer_goals=customer_goals):
+    return f"""
 You are a Reddit content strategist.
 
-Here are style and content statistics from top posts in r/{subreddit_name}:
-{summary_stats}
-
 CUSTOMER CONTEXT:
 The target audience is trying to achieve the following:
 {customer_goals}
+"""
+
+
+def build_prompt_body(summary_stats, subreddit_name=subreddit_name, product=product, brand=brand):
+    return f"""
+Here are style and content statistics from top posts in r/{subreddit_name}:
+{summary_stats}
 
 TASK:
 Create 2–3 organic post templates for a user who is sharing experience or seeking advice about a product like '{product}', possibly inspired by '{brand}'. The user is *not* affiliated with the brand and should not sound as if they're advertising.
@@ -83,11 +80,59 @@ Body: I've been manually reaching out to prospects for months and it's exhaustin
 Now, generate 2-3 templates that address the customer's goals naturally. Remember: keep it natural, organic, and related to their real challenges.
 """
 
-# ---------- Send Prompt to Ollama (Llama3) Server ----------
-response = requests.post(
-    "http://localhost:11434/api/generate",
-    json={"model": "llama3", "prompt": ollama_prompt, "stream": False}
-)
 
-print("\nGenerated Templates:\n")
-print(response.json()['response'])
+def build_prompt(summary_stats, subreddit_name=subreddit_name, product=product, brand=brand, customer_goals=customer_goals):
+    return build_prompt_prefix(customer_goals) + build_prompt_body(summary_stats, subreddit_name, product, brand)
+
+
+def generate(client, summary_stats, subreddit_name=subreddit_name, on_token=None):
+    """Generate for one subreddit, reusing the shared prefix context when enabled"""
+    body = build_prompt_body(summary_stats, subreddit_name=subreddit_name)
+    if REUSE_PREFIX_CONTEXT:
+        return client.generate(body, on_token=on_token, prefix=build_prompt_prefix(), force=FORCE_REGENERATE)
+    return client.generate(build_prompt_prefix() + body, on_token=on_token, force=FORCE_REGENERATE)
+
+
+def generate_for_subreddits(subreddit_files, client):
+    """Build one prompt per subreddit from its scrape file and generate them concurrently"""
+    names = list(subreddit_files)
+    bodies = [
+        build_prompt_body(analyze_file(subreddit_files[name]).summary(), subreddit_name=name)
+        for name in names
+    ]
+    if REUSE_PREFIX_CONTEXT:
+        results = client.generate_many(bodies, prefix=build_prompt_prefix(), force=FORCE_REGENERATE)
+    else:
+        prefix = build_prompt_prefix()
+        results = client.generate_many([prefix + body for body in bodies], force=FORCE_REGENERATE)
+    return dict(zip(names, results))
+
+
+def make_client(backend=GENERATION_BACKEND, model=GENERATION_MODEL):
+    if backend == "recorded":
+        return create_backend("recorded", model, path=RECORDING_PATH, parallelism=GENERATION_PARALLELISM)
+    cache = GenerationCache() if USE_GENERATION_CACHE else None
+    return create_backend(backend, model, base_url=OLLAMA_URL, parallelism=GENERATION_PARALLELISM, cache=cache)
+
+
+if __name__ == "__main__":
+    with make_client() as client:
+        if SUBREDDIT_FILES:
+            results = generate_for_subreddits(SUBREDDIT_FILES, client)
+            for name, result in results.items():
+                print(f"\n===== r/{name} =====")
+                print(result.text if not result.error else f"Generation failed: {result.error}")
+                print(f"[{result.summary()}]")
+        else:
+            # ---------- Load and Analyze Your Subreddit Data ----------
+            stats = analyze_file(DATA_PATH)
+            summary_stats = stats.summary()
+
+            # ---------- Stream Prompt to the Generation Backend ----------
+            print("\nGenerated Templates:\n")
+            result = generate(client, summary_stats, on_token=lambda piece: print(piece, end="", flush=True))
+            if result.error:
+                print(f"Generation failed: {result.error}", file=sys.stderr)
+            print(f"\n\n[{result.summary()}]")
+        if getattr(client, "cache", None) is not None:
+            print(client.cache.report())
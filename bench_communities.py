@@ -0,0 +1,58 @@
+"""
+Offline benchmark of CommunitiesClient against the local stub server
+(fake_communities.py).
+
+Looks up the same keywords with several worker counts on a clean server,
+then with transient 503s (Retry-After as an HTTP-date) and with a small
+rate-limit budget that forces a wait for the window reset. Every case
+must return a full result for every keyword. No cache is used, so every
+page is a request.
+
+Run: python bench_communities.py
+"""
+import contextlib
+import io
+import time
+
+from communities_client import CommunitiesClient
+from fake_communities import FakeCommunitiesServer
+
+
+KEYWORDS = [f"keyword {i}" for i in range(16)]
+PAGES = 2
+LATENCY = 0.02  # Simulated seconds per request
+WORKER_COUNTS = [1, 4, 8]
+
+CASES = [
+    # (label, server options, client workers)
+    ("clean", {}, None),
+    ("503 every 5th, Retry-After date", {"fail_every": 5, "fail_status": 503, "retry_after": "http-date"}, 4),
+    ("budget 20 per 2s window", {"budget": 20, "window": 2.0}, 4),
+]
+
+
+def run(workers, **server_options):
+    with FakeCommunitiesServer(latency=LATENCY, **server_options) as server:
+        client = CommunitiesClient(server.url, workers=workers, backoff=0.05)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            results = client.search_many(KEYWORDS, max_pages=PAGES)
+        elapsed = time.perf_counter() - start
+        client.close()
+    missing = [q for q in KEYWORDS if len(results.get(q, [])) != server.results_per_query]
+    return elapsed, client, missing, out.getvalue().strip()
+
+
+def main():
+    print(f"{len(KEYWORDS)} keywords x {PAGES} pages, {LATENCY * 1000:.0f}ms per request\n")
+    print(f"{'case':<32} {'workers':>7} {'time':>7} {'requests':>9} {'retries':>8} {'waited':>7}")
+    for label, options, fixed_workers in CASES:
+        for workers in ([fixed_workers] if fixed_workers else WORKER_COUNTS):
+            elapsed, client, missing, errors = run(workers, **options)
+            print(f"{label:<32} {workers:>7} {elapsed:>6.2f}s {client.requests:>9} {client.retries:>8} {client.waited:>6.1f}s")
+            if missing:
+                print(f"  Warning: incomplete results for {len(missing)} keywords. {errors}")
+
+
+if __name__ == "__main__":
+    main()
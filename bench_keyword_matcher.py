@@ -0,0 +1,104 @@
+"""
+Micro-benchmark: KeywordMatcher vs the plain loop it wraps (post lowered
+once, pre-lowered keywords tested with `in`), with the original loop that
+lowered the post once per keyword for reference. check() is what
+score_subreddit_texts runs per post; count() is its hit-counting mode.
+
+Run: python bench_keyword_matcher.py
+"""
+import random
+import time
+
+from keyword_matcher import KeywordMatcher
+
+
+KEYWORD_COUNTS = [10, 25, 40, 150]  # 25 is MAX_VARIANTS, the finder's usual list size
+POST_COUNT = 5000
+REPEATS = 3
+
+BASE_KEYWORDS = [
+    "B2B Data", "Sales Automation", "Lead Generation", "GTM", "SaaS", "Cold Emailing",
+    "RevOps", "Growth Hacking", "Sales teams", "Growth Marketers",
+]
+KEYWORD_HIT_RATE = 0.3  # Share of posts that mention some keyword
+
+
+def make_vocab(rng, size=3000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(2, 9))) for _ in range(size)]
+
+
+def make_keywords(n, vocab, rng):
+    keywords = list(BASE_KEYWORDS)
+    while len(keywords) < n:
+        keywords.append(" ".join(rng.choice(vocab) for _ in range(rng.randint(1, 2))).title())
+    return keywords[:n]
+
+
+def make_posts(n, vocab, keywords, rng):
+    posts = []
+    for _ in range(n):
+        words = [rng.choice(vocab) for _ in range(rng.randint(20, 200))]
+        if rng.random() < KEYWORD_HIT_RATE:
+            words.insert(rng.randrange(len(words)), rng.choice(keywords))
+        posts.append(" ".join(words).capitalize())
+    return posts
+
+
+def legacy_match(keyword_list, post_text):
+    for kw in keyword_list:
+        if kw.lower() in post_text.lower():
+            return True
+    return False
+
+
+def baseline_match(lowered_keywords, post_text):
+    text = post_text.lower()
+    return any(kw in text for kw in lowered_keywords)
+
+
+def baseline_matches(keyword_list, lowered_keywords, post_text):
+    text = post_text.lower()
+    return {kw for kw, lowered in zip(keyword_list, lowered_keywords) if lowered in text}
+
+
+def best_of(fn):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    rng = random.Random(0)
+    vocab = make_vocab(rng)
+    print(f"{POST_COUNT} posts, best of {REPEATS}")
+    print(f"{'keywords':>8} {'original':>10} {'baseline':>10} {'check':>9} {'baseline all':>13} {'count':>9}")
+
+    for n in KEYWORD_COUNTS:
+        keywords = make_keywords(n, vocab, rng)
+        lowered = [kw.lower() for kw in keywords]
+        posts = make_posts(POST_COUNT, vocab, keywords, rng)
+        matcher = KeywordMatcher(keywords)
+        counting = KeywordMatcher(keywords, count_hits=True)
+
+        for post in posts:
+            assert matcher.check(post) == legacy_match(keywords, post) == baseline_match(lowered, post)
+            assert matcher.matches(post) == baseline_matches(keywords, lowered, post)
+
+        t_legacy = best_of(lambda: [legacy_match(keywords, p) for p in posts])
+        t_baseline = best_of(lambda: [baseline_match(lowered, p) for p in posts])
+        t_check = best_of(lambda: [matcher.check(p) for p in posts])
+        t_baseline_all = best_of(lambda: [baseline_matches(keywords, lowered, p) for p in posts])
+        t_count = best_of(lambda: [counting.check(p) for p in posts])
+
+        print(
+            f"{n:>8} {t_legacy * 1000:>8.1f}ms {t_baseline * 1000:>8.1f}ms {t_check * 1000:>7.1f}ms "
+            f"{t_baseline_all * 1000:>11.1f}ms {t_count * 1000:>7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
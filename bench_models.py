@@ -0,0 +1,128 @@
+"""
+Per-model latency/throughput benchmark for ContentGen prompts.
+
+Runs the same prompt set against every model in MODELS and reports latency
+percentiles, time-to-first-token, tokens/sec, prompt-eval time and output
+length. Completions are never served from the generation cache.
+
+Run:
+  python bench_models.py                       # live Ollama at OLLAMA_URL
+  python bench_models.py --record rec.json     # live, and save a recording
+  python bench_models.py --recorded rec.json   # replay a recording offline
+  python bench_models.py --fake                # local fake Ollama server
+"""
+import argparse
+import os
+
+from ContentGen import DATA_PATH, SUBREDDIT_FILES, build_prompt
+from fake_ollama import FakeOllamaServer
+from generation_backends import RecordingBackend, create_backend
+from ollama_client import OLLAMA_URL
+from style_stats import analyze_file
+
+
+MODELS = ["llama3", "mistral", "phi3"]
+REPEATS = 3
+
+SAMPLE_STATS = """
+- Average title length: 9.4 words
+- Average body length: 120.3 words
+- Most common bigrams in titles: [(('how', 'do'), 12), (('cold', 'email'), 9)]
+- Most common words: [('leads', 21), ('outreach', 17), ('tool', 15)]
+- About 38/100 titles include a question
+- 22 posts have bullet-point lists in body
+"""
+
+# Simulated per-token latency for --fake, so models differ like real ones would
+FAKE_TOKEN_DELAYS = {"llama3": 0.004, "mistral": 0.003, "phi3": 0.002}
+
+
+def load_prompts():
+    """One prompt per scraped subreddit, falling back to a built-in sample"""
+    if SUBREDDIT_FILES:
+        return [build_prompt(analyze_file(path).summary(), subreddit_name=name) for name, path in SUBREDDIT_FILES.items()]
+    if os.path.exists(DATA_PATH):
+        return [build_prompt(analyze_file(DATA_PATH).summary())]
+    return [build_prompt(SAMPLE_STATS, subreddit_name=name) for name in ("SaaS", "sales", "Entrepreneur")]
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[rank]
+
+
+def mean(values):
+    return sum(values) / len(values) if values else float("nan")
+
+
+def bench_model(backend, model, prompts, repeats):
+    results = []
+    for _ in range(repeats):
+        for prompt in prompts:
+            results.append(backend.generate(prompt, model=model, force=True))
+    ok = [r for r in results if r.error is None]
+    latencies = [r.total_latency for r in ok]
+    return {
+        "model": model,
+        "runs": len(results),
+        "errors": len(results) - len(ok),
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "ttft": mean([r.ttft for r in ok if r.ttft is not None]),
+        "tokens_per_second": mean([r.tokens_per_second for r in ok]),
+        "prompt_eval": mean([r.prompt_eval_duration / 1e9 for r in ok if r.prompt_eval_duration]),
+        "output_chars": mean([len(r.text) for r in ok]),
+    }
+
+
+def print_report(rows):
+    print(f"{'model':<12} {'runs':>5} {'err':>4} {'p50':>7} {'p90':>7} {'p99':>7} {'ttft':>7} "
+          f"{'tok/s':>7} {'prompt':>7} {'chars':>7}")
+    for row in rows:
+        print(
+            f"{row['model']:<12} {row['runs']:>5} {row['errors']:>4} {row['p50']:>6.2f}s {row['p90']:>6.2f}s "
+            f"{row['p99']:>6.2f}s {row['ttft']:>6.2f}s {row['tokens_per_second']:>7.1f} "
+            f"{row['prompt_eval']:>6.2f}s {row['output_chars']:>7.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", default=MODELS)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--recorded", metavar="PATH", help="replay completions recorded with --record")
+    group.add_argument("--fake", action="store_true", help="run against a local fake Ollama server")
+    parser.add_argument("--record", metavar="PATH", help="save live completions for later --recorded runs")
+    args = parser.parse_args()
+
+    prompts = load_prompts()
+    print(f"{len(prompts)} prompts x {args.repeats} repeats per model\n")
+
+    fake = None
+    if args.recorded:
+        backend = create_backend("recorded", args.models[0], path=args.recorded)
+    else:
+        url = OLLAMA_URL
+        if args.fake:
+            fake = FakeOllamaServer(tokens=80, model_token_delays=FAKE_TOKEN_DELAYS).start()
+            url = fake.url
+        backend = create_backend("ollama", args.models[0], base_url=url, parallelism=1)
+        if args.record:
+            backend = RecordingBackend(backend, args.record)
+
+    try:
+        rows = [bench_model(backend, model, prompts, args.repeats) for model in args.models]
+    finally:
+        backend.close()
+        if fake is not None:
+            fake.stop()
+    print_report(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Recall/latency benchmark: PostIndex (IVF) vs brute-force cosine similarity.
+
+Builds a synthetic corpus of post embeddings clustered by subreddit, then
+for each n_probe setting reports the per-query search latency, recall@k of
+the nearest posts and overlap of the top subreddits with the exact answer.
+Insertion happens in scrape-sized batches to exercise incremental adds.
+
+Run: python bench_post_index.py
+"""
+import time
+
+import numpy as np
+
+from post_index import PostIndex
+from vector_math import normalize_rows
+
+
+DIM = 384  # all-MiniLM-L6-v2
+SUBREDDITS = 300
+POSTS_PER_SUBREDDIT = 200
+TOPICS_PER_SUBREDDIT = 3
+NOISE = 0.8  # Norm of the per-post noise relative to the unit topic directions
+N_LISTS = 256
+PROBES = [1, 4, 8, 16, 32]
+QUERIES = 50
+K = 100
+TOP_SUBREDDITS = 20
+
+
+def make_corpus(rng):
+    """Posts are noisy mixes of a few topic directions shared between subreddits"""
+    topics = normalize_rows(rng.standard_normal((SUBREDDITS // 2, DIM)))
+    batches = []
+    for s in range(SUBREDDITS):
+        own = topics[rng.choice(len(topics), TOPICS_PER_SUBREDDIT, replace=False)]
+        weights = rng.dirichlet(np.ones(TOPICS_PER_SUBREDDIT), POSTS_PER_SUBREDDIT)
+        posts = weights @ own + NOISE * rng.standard_normal((POSTS_PER_SUBREDDIT, DIM)) / np.sqrt(DIM)
+        batches.append((f"sub{s}", [f"s{s}p{i}" for i in range(POSTS_PER_SUBREDDIT)], posts))
+    noise = NOISE * rng.standard_normal((QUERIES, DIM)) / np.sqrt(DIM)
+    queries = normalize_rows(topics[rng.choice(len(topics), QUERIES)] + noise)
+    return batches, queries
+
+
+def brute_force(vectors, queries, k):
+    sims = queries @ vectors.T
+    top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    return [set(row) for row in top]
+
+
+def exact_top_subreddits(index, queries):
+    exact = PostIndex(n_lists=index.n_lists)
+    exact.vectors, exact.sub_ids, exact.subreddits, exact.post_ids = index.vectors, index.sub_ids, index.subreddits, index.post_ids
+    return exact.top_subreddits(queries, top_k=TOP_SUBREDDITS, per_query=K)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    batches, queries = make_corpus(rng)
+
+    index = PostIndex(n_lists=N_LISTS)
+    started = time.perf_counter()
+    for subreddit, post_ids, vectors in batches:
+        index.add(subreddit, post_ids, vectors)
+    build = time.perf_counter() - started
+    print(f"{len(index)} posts, {len(index.subreddits)} subreddits, dim {DIM}, {N_LISTS} lists")
+    print(f"Incremental build in {build:.2f}s ({len(batches)} batches, last trained at {index.trained_size} posts)\n")
+
+    vectors = np.asarray(index.vectors)
+    started = time.perf_counter()
+    exact = brute_force(vectors, queries, K)
+    brute_ms = (time.perf_counter() - started) / QUERIES * 1000
+    exact_subs = {sub for sub, _ in exact_top_subreddits(index, queries)}
+
+    print(f"{'method':<14} {'ms/query':>9} {'recall@' + str(K):>11} {'top-' + str(TOP_SUBREDDITS) + ' subs':>12}")
+    print(f"{'brute force':<14} {brute_ms:>9.2f} {1.0:>11.3f} {1.0:>12.2f}")
+    for n_probe in PROBES:
+        index.search(queries[:1], K, n_probe)  # Build list offsets outside the timing
+        started = time.perf_counter()
+        results = index.search(queries, K, n_probe)
+        ms = (time.perf_counter() - started) / QUERIES * 1000
+        recall = np.mean([len(set(rows) & truth) / K for (rows, _), truth in zip(results, exact)])
+        subs = {sub for sub, _ in index.top_subreddits(queries, top_k=TOP_SUBREDDITS, per_query=K, n_probe=n_probe)}
+        overlap = len(subs & exact_subs) / max(len(exact_subs), 1)
+        print(f"{'IVF probe ' + str(n_probe):<14} {ms:>9.2f} {recall:>11.3f} {overlap:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Offline benchmark of postscraper request counts against a fake Reddit client.
+
+Compares the old per-post loop (which re-enumerated the whole listing for
+its progress print and slept 0.5-1.5s per post) with the current single
+pass, then times the current loop with simulated request latency for
+several comment-expansion worker counts. Rate-limit sleeps are recorded
+rather than performed.
+
+Run: python bench_postscraper.py
+"""
+import contextlib
+import io
+import random
+import time
+
+from fake_reddit import FakeReddit
+from postscraper import RateLimitScheduler, build_post_record, scrape_subreddit_top_posts
+from reddit_clients import RedditClientPool
+
+
+POST_LIMITS = [100, 300]
+WORKER_COUNTS = [1, 4, 8]
+LATENCY = 0.02  # Simulated seconds per request for the wall-time comparison
+
+
+def legacy_scrape(reddit_client, subreddit_name, posts_limit):
+    """The previous scrape loop, with its random sleeps summed instead of slept"""
+    posts_all = []
+    slept = 0.0
+    subreddit = reddit_client.subreddit(subreddit_name)
+    for post in subreddit.top(time_filter="year", limit=posts_limit):
+        post.comments.replace_more(limit=None)
+        posts_all.append(build_post_record(post))
+        slept += random.uniform(0.5, 1.5)
+        for idx, post in enumerate(subreddit.top(time_filter="year", limit=posts_limit), 1):
+            print(f"[{idx}/{posts_limit}] Scraped post: {post.title[:40]}")
+    return posts_all, slept
+
+
+def current_scrape(reddit_client, subreddit_name, posts_limit, workers=1):
+    slept = []
+    scheduler = RateLimitScheduler(reddit_client, sleep=slept.append)
+    posts = scrape_subreddit_top_posts(
+        subreddit_name, posts_limit, reddit_client=reddit_client, scheduler=scheduler, workers=workers,
+        client_pool=RedditClientPool(reddit_client.worker_client)
+    )
+    return posts, sum(slept)
+
+
+def run(scrape, posts_limit, latency=0.0):
+    client = FakeReddit(posts_per_subreddit=posts_limit, budget=10 ** 9, latency=latency)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        posts, slept = scrape(client, "SaaS", posts_limit)
+    elapsed = time.perf_counter() - start
+    if client.concurrent_use:
+        print(f"Warning: a Reddit client was used from two threads at once ({client.concurrent_use} requests)")
+    return len(posts), client.requests_by_kind, client.requests, slept, elapsed
+
+
+def main():
+    print(f"{'posts':>6} {'version':<8} {'listing':>8} {'comments':>9} {'more':>6} {'total':>7} {'req/post':>9} {'sleep':>8}")
+    for posts_limit in POST_LIMITS:
+        for name, scrape in (("legacy", legacy_scrape), ("current", current_scrape)):
+            count, by_kind, total, slept, _ = run(scrape, posts_limit)
+            print(
+                f"{count:>6} {name:<8} {by_kind.get('listing', 0):>8} {by_kind.get('comments', 0):>9} "
+                f"{by_kind.get('more_comments', 0):>6} {total:>7} {total / max(count, 1):>9.2f} {slept:>7.1f}s"
+            )
+
+    print(f"\nWall time for {POST_LIMITS[0]} posts at {LATENCY * 1000:.0f}ms per request")
+    for workers in WORKER_COUNTS:
+        scrape = lambda client, name, limit: current_scrape(client, name, limit, workers=workers)
+        count, _, total, _, elapsed = run(scrape, POST_LIMITS[0], latency=LATENCY)
+        print(f"  workers={workers}: {elapsed:.2f}s ({count * 60 / elapsed:.0f} posts/min, {total} requests)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Startup benchmark for contextsubredditfinder.
+
+Each workflow mode runs in a fresh interpreter. The child reports wall time
+and peak RSS after importing the module, after building keywords (what a
+dry run pays), and after preloading the resources a full run needs.
+
+Run: python bench_startup.py
+"""
+import json
+import subprocess
+import sys
+
+
+CHILD = r"""
+import json, resource, sys, time
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def phase(name, fn):
+    start = time.perf_counter()
+    result = fn()
+    print("BENCH " + json.dumps([name, time.perf_counter() - start, peak_rss_mb()]), flush=True)
+    return result
+
+mode = sys.argv[1]
+finder = phase("import", lambda: __import__("contextsubredditfinder"))
+phase("keywords", lambda: finder.select_keywords(mode))
+phase("preload", lambda: finder.preload(reddit=True, model=True, nlp=False))
+"""
+
+PHASES = ["import", "keywords", "preload"]
+
+
+def run_mode(mode):
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD, mode],
+        capture_output=True,
+        text=True
+    )
+    report = {}
+    for line in proc.stdout.splitlines():
+        if line.startswith("BENCH "):
+            name, seconds, rss = json.loads(line[len("BENCH "):])
+            report[name] = (seconds, rss)
+    error = None
+    if proc.returncode != 0:
+        error = (proc.stderr.strip().splitlines() or ["no output"])[-1]
+    return report, error
+
+
+def main():
+    print(f"{'mode':<15}" + "".join(f"{phase:>22}" for phase in PHASES))
+    for mode in ("auto_keywords", "manual", "brand_context"):
+        report, error = run_mode(mode)
+        cells = []
+        for phase in PHASES:
+            if phase in report:
+                seconds, rss = report[phase]
+                cells.append(f"{seconds:>9.2f}s {rss:>8.0f}MB")
+            else:
+                cells.append(f"{'-':>22}")
+        print(f"{mode:<15}" + "".join(f"{cell:>22}" for cell in cells))
+        if error:
+            print(f"{'':<15}stopped: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Storage benchmark: postscraper's JSON output vs the columnar store.
+
+Writes the same synthetic scrape (posts with comment trees) in both formats,
+then in a fresh interpreter per case measures file size, time to load/open,
+time to read every record, and peak RSS above the interpreter's baseline.
+
+Run: python bench_storage.py [posts] [comments_per_post]
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from columnar_store import save_columnar
+from postscraper import save_to_json
+
+
+POSTS = 3000
+COMMENTS_PER_POST = 60
+AUTHORS = 4000
+FLAIRS = ["Question", "Discussion", "Help", "Showcase", None]
+
+CHILD = r"""
+import json, resource, sys, time
+
+def peak_rss_mb():
+    # ru_maxrss survives exec on Linux, so it would include the parent's peak;
+    # VmHWM belongs to this process image only
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+kind, path = sys.argv[1], sys.argv[2]
+from columnar_store import ColumnarPosts
+baseline = peak_rss_mb()
+
+start = time.perf_counter()
+if kind == "json":
+    with open(path, "r", encoding="utf-8") as f:
+        posts = json.load(f)
+else:
+    posts = ColumnarPosts(path)
+load = time.perf_counter() - start
+
+start = time.perf_counter()
+chars = 0
+for post in posts:
+    chars += len(post["title"]) + sum(len(c["body"]) for c in post["comments_data"])
+read = time.perf_counter() - start
+print("BENCH " + json.dumps([load, read, peak_rss_mb() - baseline, chars]))
+"""
+
+
+def make_posts(n, comments_per_post, rng):
+    words = ["lead", "outreach", "pipeline", "crm", "pricing", "churn", "cold", "email", "sdr", "tool",
+             "hiring", "quota", "demo", "signal", "data", "enrichment", "workflow", "agency", "saas", "growth"]
+    authors = [f"user_{i}" for i in range(AUTHORS)]
+    base = 1_700_000_000
+
+    def text(lo, hi):
+        return " ".join(rng.choice(words) for _ in range(rng.randint(lo, hi)))
+
+    posts = []
+    for i in range(n):
+        created = base + rng.randint(0, 365 * 86400)
+        comments = [{
+            "comment_id": f"c{i}_{j}",
+            "parent_id": f"t3_p{i}" if j % 3 == 0 else f"t1_c{i}_{j - 1}",
+            "body": text(5, 80),
+            "author": rng.choice(authors),
+            "score": rng.randint(-5, 500),
+            "created_utc": datetime.fromtimestamp(created + rng.randint(60, 86400)).isoformat(),
+            "is_submitter": rng.random() < 0.1,
+        } for j in range(rng.randint(0, 2 * comments_per_post))]
+        posts.append({
+            "post_id": f"p{i}",
+            "title": text(5, 15),
+            "selftext": text(0, 200),
+            "url": f"https://www.reddit.com/r/SaaS/comments/p{i}/",
+            "score": rng.randint(0, 5000),
+            "upvote_ratio": round(rng.uniform(0.5, 1.0), 2),
+            "num_comments": len(comments),
+            "created_utc": datetime.fromtimestamp(created).isoformat(),
+            "author": rng.choice(authors),
+            "flair": rng.choice(FLAIRS),
+            "permalink": f"https://reddit.com/r/SaaS/comments/p{i}/",
+            "comments_data": comments,
+        })
+    return posts
+
+
+def disk_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def run_case(kind, path):
+    here = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run([sys.executable, "-c", CHILD, kind, path], capture_output=True, text=True, cwd=here)
+    for line in proc.stdout.splitlines():
+        if line.startswith("BENCH "):
+            return json.loads(line[len("BENCH "):])
+    raise RuntimeError(proc.stderr.strip() or "no output")
+
+
+def main():
+    posts_count = int(sys.argv[1]) if len(sys.argv) > 1 else POSTS
+    comments = int(sys.argv[2]) if len(sys.argv) > 2 else COMMENTS_PER_POST
+    posts = make_posts(posts_count, comments, random.Random(0))
+    total_comments = sum(len(p["comments_data"]) for p in posts)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "SaaS.json")
+        cols_path = os.path.join(tmp, "SaaS.cols")
+        start = time.perf_counter()
+        save_to_json(posts, "SaaS", filename=json_path)
+        json_write = time.perf_counter() - start
+        start = time.perf_counter()
+        save_columnar(posts, cols_path)
+        cols_write = time.perf_counter() - start
+        del posts
+
+        print(f"\n{posts_count} posts, {total_comments} comments\n")
+        print(f"{'format':<10} {'size':>9} {'write':>8} {'load':>8} {'read all':>9} {'peak RSS':>10}")
+        results = {}
+        for kind, path, write in (("json", json_path, json_write), ("columnar", cols_path, cols_write)):
+            load, read, rss, chars = run_case(kind, path)
+            results[kind] = chars
+            print(f"{kind:<10} {disk_size(path) / 1e6:>7.1f}MB {write:>7.2f}s {load:>7.3f}s {read:>8.2f}s {rss:>8.0f}MB")
+        if results["json"] != results["columnar"]:
+            print("Warning: the two formats returned different text")
+
+
+if __name__ == "__main__":
+    main()
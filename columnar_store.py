@@ -0,0 +1,245 @@
+"""
+Columnar storage for scraped posts and comments.
+
+A store is a directory (by convention <name>.cols) of .npy column files plus
+meta.json. Numbers are typed columns (int64 epoch seconds, int32 scores,
+float32 ratios); free text is one UTF-8 byte heap per column with int64
+offsets; authors and flairs are interned into string tables and stored as
+int32 codes. Comments of post i are rows comment_start[i]:comment_start[i+1]
+of the comment columns.
+
+ColumnarPosts memory-maps the columns, so opening a store costs almost
+nothing; records are rebuilt one at a time, in the same shape postscraper
+writes to JSON, only when they are read.
+"""
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+
+COLUMNAR_FORMAT_VERSION = 1
+COLUMNAR_SUFFIX = ".cols"
+
+POST_TEXT_COLUMNS = ("post_id", "title", "selftext", "url", "permalink")
+COMMENT_TEXT_COLUMNS = ("comment_id", "parent_id", "body")
+
+
+def _old_path(path):
+    return path.rstrip(os.sep) + ".old"
+
+
+def _resolve(path):
+    """The store to read: path, or the previous store while a save is swapping it in"""
+    if not os.path.isdir(path) and os.path.isdir(_old_path(path)):
+        return _old_path(path)
+    return path
+
+
+def is_columnar(path):
+    return path.endswith(COLUMNAR_SUFFIX) and os.path.isdir(_resolve(path))
+
+
+def _to_epoch(value):
+    """Epoch seconds from the scraper's ISO timestamp (or an epoch number)"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+def _to_iso(epoch):
+    return datetime.fromtimestamp(int(epoch)).isoformat()
+
+
+class _TextColumn:
+    """Append-only builder for a byte heap + offsets column"""
+    def __init__(self):
+        self.chunks = []
+        self.offsets = [0]
+
+    def append(self, text):
+        data = (text or "").encode("utf-8")
+        self.chunks.append(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+
+    def save(self, directory, name):
+        np.save(os.path.join(directory, f"{name}.bytes.npy"), np.frombuffer(b"".join(self.chunks), dtype=np.uint8))
+        np.save(os.path.join(directory, f"{name}.offsets.npy"), np.asarray(self.offsets, dtype=np.int64))
+
+
+class _Interner:
+    """Maps strings to dense int32 codes; None is -1"""
+    def __init__(self):
+        self.codes = {}
+        self.strings = []
+
+    def code(self, value):
+        if value is None:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+
+def save_columnar(posts, path):
+    """Write post records (an iterable of postscraper dicts) as a columnar store; returns the post count"""
+    post_text = {name: _TextColumn() for name in POST_TEXT_COLUMNS}
+    comment_text = {name: _TextColumn() for name in COMMENT_TEXT_COLUMNS}
+    authors = _Interner()
+    flairs = _Interner()
+    post_cols = {name: [] for name in ("score", "upvote_ratio", "num_comments", "created_utc", "author", "flair")}
+    comment_cols = {name: [] for name in ("score", "created_utc", "author", "is_submitter")}
+    comment_start = [0]
+
+    for post in posts:
+        for name in POST_TEXT_COLUMNS:
+            post_text[name].append(post.get(name))
+        post_cols["score"].append(post.get("score") or 0)
+        post_cols["upvote_ratio"].append(post.get("upvote_ratio") or 0.0)
+        post_cols["num_comments"].append(post.get("num_comments") or 0)
+        post_cols["created_utc"].append(_to_epoch(post["created_utc"]))
+        post_cols["author"].append(authors.code(post.get("author")))
+        post_cols["flair"].append(flairs.code(post.get("flair")))
+        comments = post.get("comments_data") or []
+        for comment in comments:
+            for name in COMMENT_TEXT_COLUMNS:
+                comment_text[name].append(comment.get(name))
+            comment_cols["score"].append(comment.get("score") or 0)
+            comment_cols["created_utc"].append(_to_epoch(comment["created_utc"]))
+            comment_cols["author"].append(authors.code(comment.get("author")))
+            comment_cols["is_submitter"].append(bool(comment.get("is_submitter")))
+        comment_start.append(comment_start[-1] + len(comments))
+
+    # Write next to the target and swap in, so readers never see a half-written store
+    tmp = path.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    dtypes = {"score": np.int32, "upvote_ratio": np.float32, "num_comments": np.int32,
+              "created_utc": np.int64, "author": np.int32, "flair": np.int32, "is_submitter": np.bool_}
+    for name, values in post_cols.items():
+        np.save(os.path.join(tmp, f"post_{name}.npy"), np.asarray(values, dtype=dtypes[name]))
+    for name, values in comment_cols.items():
+        np.save(os.path.join(tmp, f"comment_{name}.npy"), np.asarray(values, dtype=dtypes[name]))
+    np.save(os.path.join(tmp, "comment_start.npy"), np.asarray(comment_start, dtype=np.int64))
+    for name, column in post_text.items():
+        column.save(tmp, f"post_{name}")
+    for name, column in comment_text.items():
+        column.save(tmp, f"comment_{name}")
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "version": COLUMNAR_FORMAT_VERSION,
+            "posts": len(comment_start) - 1,
+            "comments": comment_start[-1],
+            "authors": authors.strings,
+            "flairs": flairs.strings,
+        }, f, ensure_ascii=False)
+    # A directory can't be replaced by another, so the old store is moved aside
+    # first. Readers (and a crash at that moment) fall back to it via _resolve().
+    old = _old_path(path)
+    if os.path.isdir(path):
+        shutil.rmtree(old, ignore_errors=True)
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    return len(comment_start) - 1
+
+
+class ColumnarPosts:
+    """
+    Read-only, memory-mapped view of a columnar store. Iterating (or
+    indexing) yields post dicts with their comments_data, built on demand;
+    column() exposes a raw NumPy column for vectorized work.
+    """
+    def __init__(self, path):
+        self.path = path = _resolve(path)
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != COLUMNAR_FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar store version in {path}: {meta.get('version')}")
+        self.authors = meta["authors"]
+        self.flairs = meta["flairs"]
+        self._count = meta["posts"]
+        self._columns = {}
+
+    def __len__(self):
+        return self._count
+
+    def column(self, name):
+        """A memory-mapped column, e.g. 'post_score' or 'comment_created_utc'"""
+        array = self._columns.get(name)
+        if array is None:
+            mapped = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+            # A plain ndarray view of the mapping skips np.memmap's per-slice Python overhead
+            array = self._columns[name] = mapped.view(np.ndarray) if isinstance(mapped, np.memmap) else mapped
+        return array
+
+    def _text(self, name, i):
+        offsets = self.column(f"{name}.offsets")
+        return bytes(self.column(f"{name}.bytes")[offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+    def _texts(self, name, start, end):
+        """Rows start:end of a text column, copied out of the heap in one slice"""
+        offsets = np.asarray(self.column(f"{name}.offsets")[start:end + 1])
+        base = int(offsets[0]) if len(offsets) else 0
+        blob = bytes(self.column(f"{name}.bytes")[base:int(offsets[-1]) if len(offsets) else 0])
+        return [blob[a - base:b - base].decode("utf-8") for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+    def _author(self, code):
+        return self.authors[code] if code >= 0 else None
+
+    def comments(self, i):
+        start, end = (int(x) for x in self.column("comment_start")[i:i + 2])
+        columns = zip(
+            self._texts("comment_comment_id", start, end),
+            self._texts("comment_parent_id", start, end),
+            self._texts("comment_body", start, end),
+            self.column("comment_author")[start:end].tolist(),
+            self.column("comment_score")[start:end].tolist(),
+            self.column("comment_created_utc")[start:end].tolist(),
+            self.column("comment_is_submitter")[start:end].tolist(),
+        )
+        return [
+            {
+                "comment_id": comment_id,
+                "parent_id": parent_id,
+                "body": body,
+                "author": self._author(author),
+                "score": score,
+                "created_utc": _to_iso(created),
+                "is_submitter": is_submitter,
+            }
+            for comment_id, parent_id, body, author, score, created, is_submitter in columns
+        ]
+
+    def __getitem__(self, i):
+        if not -self._count <= i < self._count:
+            raise IndexError(i)
+        i %= self._count
+        flair = int(self.column("post_flair")[i])
+        return {
+            "post_id": self._text("post_post_id", i),
+            "title": self._text("post_title", i),
+            "selftext": self._text("post_selftext", i),
+            "url": self._text("post_url", i),
+            "score": int(self.column("post_score")[i]),
+            "upvote_ratio": float(round(float(self.column("post_upvote_ratio")[i]), 4)),
+            "num_comments": int(self.column("post_num_comments")[i]),
+            "created_utc": _to_iso(self.column("post_created_utc")[i]),
+            "author": self._author(int(self.column("post_author")[i])),
+            "flair": self.flairs[flair] if flair >= 0 else None,
+            "permalink": self._text("post_permalink", i),
+            "comments_data": self.comments(i),
+        }
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+
+def iter_columnar_posts(path):
+    """Yield post records from a columnar store one at a time"""
+    yield from ColumnarPosts(path)
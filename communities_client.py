@@ -0,0 +1,278 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import instrumentation
+
+
+COMMUNITIES_URL = "https://www.reddit.com"
+COMMUNITIES_USER_AGENT = "breddit-v1 subreddit finder (https://github.com/venkateshmedasani/breddit-v1)"
+COMMUNITIES_WORKERS = 4
+COMMUNITIES_PAGE_LIMIT = 100  # Subreddits per page; Reddit's maximum
+COMMUNITIES_MAX_PAGES = 2  # Pages followed via `after` per keyword
+COMMUNITIES_TIMEOUT = (5, 30)  # (connect, read) seconds
+COMMUNITIES_MAX_RETRIES = 4
+COMMUNITIES_BACKOFF = 1.0  # Seconds before the first retry; doubles on every retry
+COMMUNITIES_RESERVE = 2  # Requests left in the window before waiting for its reset
+COMMUNITIES_CACHE_PATH = os.path.join(".cache", "communities.sqlite")
+COMMUNITIES_CACHE_TTL = 6 * 3600
+
+
+def _seconds_header(value, now):
+    """Seconds from a delay-seconds or HTTP-date header value (RFC 9110); None if malformed"""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - now, 0.0)
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class CommunitiesCache:
+    """Persistent SQLite cache of communities search pages, keyed by query, page size and `after`"""
+    def __init__(self, path=COMMUNITIES_CACHE_PATH, ttl=COMMUNITIES_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " query TEXT NOT NULL, page_limit INTEGER NOT NULL, after TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL, page TEXT NOT NULL, PRIMARY KEY (query, page_limit, after))"
+            )
+        return self._conn
+
+    def get(self, query, limit, after):
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT fetched_at, page FROM pages WHERE query = ? AND page_limit = ? AND after = ?",
+                (query.lower(), limit, after or "")
+            ).fetchone()
+            fresh = row is not None and time.time() - row[0] <= self.ttl
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        instrumentation.count("communities_cache.hits" if fresh else "communities_cache.misses")
+        return json.loads(row[1]) if fresh else None
+
+    def put(self, query, limit, after, page):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                (query.lower(), limit, after or "", time.time(), json.dumps(page))
+            )
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class CommunitiesClient:
+    """
+    Client for Reddit's communities search (/subreddits/search.json).
+
+    Looks up many keywords concurrently over one pooled session, following
+    `after` for up to max_pages pages per keyword. Every response updates a
+    shared view of Reddit's X-Ratelimit-Remaining / X-Ratelimit-Reset
+    headers; when the window is nearly used up, all workers wait for the
+    reset. 429s hold back the whole pool until Retry-After or the window
+    reset; 5xx responses and network errors are retried with exponential
+    backoff on the failing worker only. Pages are cached by query, so
+    repeated lookups never reach the network while fresh.
+
+    base_url can point at a local stub server (see fake_communities.py).
+    """
+    def __init__(self, base_url=COMMUNITIES_URL, user_agent=COMMUNITIES_USER_AGENT, workers=COMMUNITIES_WORKERS,
+                 timeout=COMMUNITIES_TIMEOUT, max_retries=COMMUNITIES_MAX_RETRIES, backoff=COMMUNITIES_BACKOFF,
+                 reserve=COMMUNITIES_RESERVE, cache=None, clock=time.time, sleep=time.sleep):
+        self.base_url = base_url.rstrip("/")
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.reserve = reserve
+        self.cache = cache
+        self.clock = clock
+        self.sleep = sleep
+        self.requests = 0
+        self.retries = 0
+        self.waited = 0.0
+        self._remaining = None
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = user_agent
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _wait_turn(self):
+        with self._lock:
+            delay = self._resume_at - self.clock()
+            if delay <= 0 and self._remaining is not None and self._remaining <= self.reserve:
+                self._remaining = None  # Window should have reset; the next response tells us
+        if delay > 0:
+            with self._lock:
+                self.waited += delay
+            instrumentation.add_time("reddit.rate_limit_wait", delay)
+            self.sleep(delay)
+
+    def _update_limits(self, headers):
+        try:
+            remaining = float(headers["X-Ratelimit-Remaining"])
+        except (KeyError, ValueError):
+            remaining = None
+        reset = _seconds_header(headers.get("X-Ratelimit-Reset"), time.time())
+        with self._lock:
+            if remaining is not None:
+                self._remaining = remaining
+            if reset is not None and self._remaining is not None and self._remaining <= self.reserve:
+                self._resume_at = max(self._resume_at, self.clock() + reset)
+
+    def _backoff(self, attempt, resp=None):
+        """
+        Wait before a retry. A 429 means the shared budget is used up, so the
+        whole pool waits (for Retry-After or the window reset). Network errors
+        and 5xx only back off the failing worker.
+        """
+        delay = self.backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+        rate_limited = resp is not None and resp.status_code == 429
+        if resp is not None:
+            # A malformed hint counts as no hint
+            retry_after = _seconds_header(resp.headers.get("Retry-After"), time.time())
+            if retry_after is None and rate_limited:
+                retry_after = _seconds_header(resp.headers.get("X-Ratelimit-Reset"), time.time())
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+        instrumentation.count("reddit.retries")
+        with self._lock:
+            self.retries += 1
+            if rate_limited:
+                self._resume_at = max(self._resume_at, self.clock() + delay)
+        if not rate_limited:
+            instrumentation.add_time("reddit.retry_backoff", delay)
+            self.sleep(delay)
+
+    def fetch_page(self, query, limit=COMMUNITIES_PAGE_LIMIT, after=None):
+        """Return (subreddit names, after token) for one page of results"""
+        if self.cache is not None:
+            cached = self.cache.get(query, limit, after)
+            if cached is not None:
+                return cached["names"], cached["after"]
+
+        params = {"q": query, "limit": limit}
+        if after:
+            params["after"] = after
+        for attempt in range(self.max_retries + 1):
+            self._wait_turn()
+            with self._lock:
+                self.requests += 1
+            instrumentation.count("reddit.requests")
+            try:
+                with instrumentation.timer("reddit.communities_search"):
+                    resp = self.session.get(
+                        f"{self.base_url}/subreddits/search.json", params=params, timeout=self.timeout
+                    )
+            except requests.RequestException:
+                if attempt == self.max_retries:
+                    raise
+                self._backoff(attempt)
+                continue
+            self._update_limits(resp.headers)
+            if resp.status_code == 429 or resp.status_code >= 500:
+                if attempt == self.max_retries:
+                    resp.raise_for_status()
+                self._backoff(attempt, resp)
+                continue
+            resp.raise_for_status()
+            data = resp.json().get("data", {})
+            names = [child.get("data", {}).get("display_name", "") for child in data.get("children", [])]
+            names = [name for name in names if name]
+            next_after = data.get("after")
+            if self.cache is not None:
+                self.cache.put(query, limit, after, {"names": names, "after": next_after})
+            return names, next_after
+
+    def search(self, query, max_pages=COMMUNITIES_MAX_PAGES, limit=COMMUNITIES_PAGE_LIMIT):
+        """Subreddit names for one query across up to max_pages pages, in result order"""
+        names = []
+        after = None
+        for _ in range(max_pages):
+            page, after = self.fetch_page(query, limit, after)
+            names.extend(page)
+            if not after or not page:
+                break
+        return names
+
+    def search_many(self, queries, max_pages=COMMUNITIES_MAX_PAGES, limit=COMMUNITIES_PAGE_LIMIT):
+        """Run search() for every query concurrently; returns {query: names}, failures reported and skipped"""
+        queries = list(dict.fromkeys(queries))
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {q: pool.submit(self.search, q, max_pages, limit) for q in queries}
+            for query, future in futures.items():
+                try:
+                    results[query] = future.result()
+                except Exception as e:
+                    print(f"Error retrieving communities for '{query}': {e}")
+        return results
+
+    def ranked_subreddits(self, queries, exclude_subs=(), max_subs=25, max_pages=COMMUNITIES_MAX_PAGES):
+        """
+        Merge results for all queries and rank subreddits by how many queries
+        returned them, breaking ties by their best position in any result.
+        """
+        frequency = Counter()
+        best_rank = {}
+        display = {}
+        for names in self.search_many(queries, max_pages).values():
+            seen = set()
+            for rank, name in enumerate(names):
+                key = name.lower()
+                if key in seen:
+                    continue
+                seen.add(key)
+                frequency[key] += 1
+                best_rank[key] = min(best_rank.get(key, rank), rank)
+                display.setdefault(key, name)
+        excluded = {s.lower() for s in exclude_subs}
+        ranked = sorted((key for key in frequency if key not in excluded), key=lambda k: (-frequency[k], best_rank[k]))
+        return [display[key] for key in ranked[:max_subs]]
+
+    def report(self):
+        cached = f", {self.cache.hits} cached pages" if self.cache is not None else ""
+        return f"Communities search: {self.requests} requests, {self.retries} retries, {self.waited:.1f}s of worker time waiting on the rate limit{cached}"
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
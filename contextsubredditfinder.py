@@ -1,10 +1,17 @@
-import praw
-import requests
-from collections import defaultdict
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import os
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import spacy
+from keyword_matcher import KeywordMatcher
+from vocab_vectors import VocabVectors
+from embedding_cache import EmbeddingCache
+from subreddit_index import SubredditIndex
+from post_index import POST_INDEX_DIR, PostIndex
+from vector_math import normalize_rows
+from communities_client import CommunitiesCache, CommunitiesClient
+from reddit_clients import RedditClientPool
+import instrumentation
 
 
 # --- CONFIG ---
@@ -14,6 +21,8 @@ REDDIT_USER_AGENT = "placeholder"
 
 # Choose workflow mode: "manual", "brand_context", or "auto_keywords"
 WORKFLOW_MODE = "auto_keywords"  # CHANGE THIS to switch workflows
+WORKFLOW_MODES = ("manual", "brand_context", "auto_keywords")
+DRY_RUN = False  # Only print the generated keywords, skip Reddit and embeddings
 
 # WORKFLOW 1 & 2: Manual keywords list
 KEYWORDS = ["B2B Data", "Sales Automation", "Lead Generation", "GTM", "SaaS"]
@@ -26,10 +35,28 @@ BRAND_CONTEXT = {
 
 DESIRED_COUNT = 20
 RELATED_COUNT = 20
+COMMUNITIES_PAGES = 2  # Communities search pages (100 subreddits each) per keyword
 
 MIN_KEYWORD_POSTS = 2
 MIN_RATIO = 0.02
 
+# Number of subreddit listings fetched in parallel during relevance checks
+DISCOVERY_WORKERS = 8
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+USE_EMBEDDING_CACHE = True  # Reuse post/keyword embeddings across runs (.cache/embeddings.sqlite)
+# Reuse recent posts, their embeddings and keyword searches across runs
+# (.cache/subreddit_index.sqlite); only stale entries are fetched again
+USE_SUBREDDIT_INDEX = True
+# Also propose subreddits whose locally scraped posts (post_index.py) are
+# closest to the keywords; they go through the same relevance check
+USE_POST_INDEX = True
+POST_INDEX_CANDIDATES = 20
+
+# spaCy variant expansion (manual and brand_context workflows)
+VARIANT_SIM_THRESHOLD = 0.50
+MAX_VARIANTS = 25  # Total keywords after expansion, originals included
+
 # Stricter semantic threshold for auto_keywords mode
 SEMANTIC_SIM_THRESHOLD = 0.35  # Default
 STRICT_SEMANTIC_THRESHOLD = 0.45  # For auto_keywords workflow
@@ -99,129 +126,441 @@ def generate_keywords_from_brand(brand_context):
 
 
 # --- spaCy keyword variant expansion ---
-def get_word_variants(keywords):
-    """Generate variants for multiple keywords using spaCy"""
-    nlp = spacy.load('en_core_web_md')
-    all_variants = set(keywords)  # Start with original keywords
-    
-    for keyword in keywords:
-        token = nlp(keyword)
-        similar_words = [w.text for w in nlp.vocab if w.has_vector and w.is_lower and w.prob >= -15]
-        
-        for w in similar_words:
-            if token.similarity(nlp(w)) > 0.50 and w not in keyword:
-                all_variants.add(w)
-            if len(all_variants) >= 25:  # Limit for runtime
+@instrumentation.timed("spacy.word_variants")
+def get_word_variants(keywords, sim_threshold=VARIANT_SIM_THRESHOLD, max_variants=MAX_VARIANTS):
+    """Generate variants for multiple keywords using spaCy vocab vectors"""
+    nlp = get_nlp()
+    vocab = VocabVectors.load_or_build(nlp)
+    keyword_vectors = [nlp(keyword).vector for keyword in keywords]
+    similar = vocab.similar_words(keyword_vectors, sim_threshold)
+
+    # Same selection as walking nlp.vocab per keyword: keywords in order, words in vocab order
+    all_variants = dict.fromkeys(keywords)  # Start with original keywords
+    for keyword, words in zip(keywords, similar):
+        for w in words:
+            if len(all_variants) >= max_variants:  # Limit for runtime
                 break
-    
+            if w not in keyword:
+                all_variants.setdefault(w)
+
     variants_list = list(all_variants)
     print(f"spaCy-generated keyword variants ({len(variants_list)} total): {variants_list}")
     return variants_list
 
 
-# --- INIT REDDIT & BERT ---
-reddit = praw.Reddit(
-    client_id=REDDIT_CLIENT_ID,
-    client_secret=REDDIT_CLIENT_SECRET,
-    user_agent=REDDIT_USER_AGENT
-)
+# --- SHARED RESOURCES (created on first use) ---
+SPACY_MODEL_NAME = 'en_core_web_md'
+
+_resources = {}
+_resources_lock = threading.Lock()
+
+
+def _get_resource(name, factory):
+    resource = _resources.get(name)
+    if resource is None:
+        with _resources_lock:
+            resource = _resources.get(name)
+            if resource is None:
+                resource = factory()
+                _resources[name] = resource
+    return resource
+
+
+def _create_reddit():
+    import praw
+    return praw.Reddit(
+        client_id=REDDIT_CLIENT_ID,
+        client_secret=REDDIT_CLIENT_SECRET,
+        user_agent=REDDIT_USER_AGENT
+    )
+
+
+def _create_model():
+    with instrumentation.timer("embeddings.model_load"):
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(EMBEDDING_MODEL_NAME)
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
 
+def _create_nlp():
+    with instrumentation.timer("spacy.load"):
+        import spacy
+        return spacy.load(SPACY_MODEL_NAME)
 
-def fetch_posts(keywords, max_posts=150):
-    """Fetch posts for multiple keywords"""
-    all_posts = []
+
+def get_reddit():
+    return _get_resource("reddit", _create_reddit)
+
+
+def get_worker_clients():
+    """Pool of Reddit clients for worker threads; get_reddit() is for the calling thread only"""
+    return _get_resource("reddit_pool", lambda: RedditClientPool(_create_reddit))
+
+
+def get_model():
+    return _get_resource("model", _create_model)
+
+
+def get_nlp():
+    return _get_resource("nlp", _create_nlp)
+
+
+def preload(reddit=True, model=True, nlp=False):
+    """
+    Create shared resources up front, e.g. in a long-lived process, and run
+    one encode so the first real request doesn't pay the warm-up cost.
+    """
+    if reddit:
+        get_reddit()
+    if model:
+        get_model().encode(["warm up"])
+    if nlp:
+        get_nlp()
+
+
+embedding_cache = EmbeddingCache(EMBEDDING_MODEL_NAME)
+subreddit_index = SubredditIndex(EMBEDDING_MODEL_NAME)
+
+
+def encode_texts(texts, batch_size=64):
+    """Embed texts, serving repeats from the persistent cache when enabled"""
+    model = get_model()
+    instrumentation.count("embeddings.requested", 1 if isinstance(texts, str) else len(texts))
+    with instrumentation.timer("embeddings.encode"):
+        if USE_EMBEDDING_CACHE:
+            return embedding_cache.encode(model, texts, batch_size=batch_size)
+        instrumentation.count("embeddings.encoded", 1 if isinstance(texts, str) else len(texts))
+        return model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+
+def search_keyword(keyword, max_posts=150, index=None):
+    """Return [(post_id, subreddit), ...] for a keyword search, cached in the index"""
+    if index is not None:
+        cached = index.get_search(keyword, max_posts)
+        if cached is not None:
+            return cached
+    with instrumentation.timer("reddit.search"):
+        results = [
+            (post.id, post.subreddit.display_name)
+            for post in get_reddit().subreddit("all").search(keyword, sort="relevance", limit=max_posts)
+        ]
+    instrumentation.count("reddit.requests", max(1, -(-len(results) // 100)))  # One request per 100 results
+    if index is not None:
+        index.put_search(keyword, max_posts, results)
+    return results
+
+
+def fetch_candidate_subs(keywords, max_posts=150, index=None):
+    """Search posts for multiple keywords and return their subreddits, in first-seen order"""
     seen_ids = set()
-    
+    ordered_subs = {}
     for keyword in keywords[:10]:  # Limit to first 10 keywords
         print(f"Searching Reddit posts for '{keyword}'...")
         try:
-            for post in reddit.subreddit("all").search(keyword, sort="relevance", limit=max_posts):
-                if post.id not in seen_ids:
-                    all_posts.append(post)
-                    seen_ids.add(post.id)
+            results = search_keyword(keyword, max_posts, index)
         except Exception as e:
             print(f"Error searching '{keyword}': {e}")
-    
-    print(f"Found {len(all_posts)} unique posts across all keywords.")
-    return all_posts
-
-
-def ordered_unique_subs(posts):
-    ordered_subs = []
-    seen = set()
-    for p in posts:
-        subname = p.subreddit.display_name
-        if subname not in seen:
-            ordered_subs.append(subname)
-            seen.add(subname)
+            continue
+        for post_id, subname in results:
+            if post_id not in seen_ids:
+                seen_ids.add(post_id)
+                ordered_subs.setdefault(subname, None)
+    print(f"Found {len(seen_ids)} unique posts across all keywords.")
     print(f"Candidate subreddits (unique, ordered): {len(ordered_subs)} subreddits")
-    return ordered_subs
+    return list(ordered_subs)
 
 
-def check_subreddit_relevance(
-    subreddit,
+def local_candidate_subs(keyword_embeddings, top_k=POST_INDEX_CANDIDATES, directory=POST_INDEX_DIR):
+    """Subreddits ranked by similarity of their scraped posts to the keywords, if an index exists"""
+    if not os.path.exists(os.path.join(directory, "meta.json")):
+        return []
+    index = PostIndex.load(directory)
+    if index.model_name != EMBEDDING_MODEL_NAME or not len(index):
+        return []
+    ranked = index.top_subreddits(keyword_embeddings, top_k=top_k)
+    print(f"Post index: {len(ranked)} candidate subreddits from {len(index)} scraped posts")
+    return [sub for sub, _ in ranked]
+
+
+def post_text(post):
+    return (post.title or "") + " " + (post.selftext or "")
+
+
+def fetch_subreddit_texts(subreddit, limit=100, reddit_client=None):
+    """Fetch the text of a subreddit's newest posts"""
+    client = reddit_client or get_reddit()
+    with instrumentation.timer("reddit.subreddit_new"):
+        texts = [post_text(p) for p in client.subreddit(subreddit).new(limit=limit)]
+    instrumentation.count("reddit.requests")
+    return texts
+
+
+def load_subreddit_texts(subreddit, reddit_client=None, index=None):
+    """Return (texts, embeddings) from a fresh index entry, or (texts, None) fetched from Reddit"""
+    if index is not None:
+        entry = index.get(subreddit)
+        if entry is not None:
+            return entry
+    return fetch_subreddit_texts(subreddit, reddit_client=reddit_client), None
+
+
+def max_keyword_similarity(texts, keyword_embeddings, batch_size=64):
+    """
+    Encode all texts in one batch and return each text's max cosine
+    similarity against the keyword embeddings.
+    """
+    if not texts:
+        return np.zeros(0, dtype=np.float32)
+    post_embs = encode_texts(texts, batch_size=batch_size)
+    return (normalize_rows(post_embs) @ normalize_rows(keyword_embeddings).T).max(axis=1)
+
+
+@instrumentation.timed("relevance.score")
+def score_subreddit_texts(
+    texts_by_sub,
     keyword_list,
     keyword_embeddings,
+    use_semantics=True,
+    matcher=None,
+    embeddings_by_sub=None
+):
+    """
+    Score recent posts for one or many subreddits at once.
+
+    Posts that contain a keyword are matched directly; all remaining posts,
+    across every subreddit, are embedded in a single batch. Subreddits with
+    post embeddings in embeddings_by_sub (e.g. from the SubredditIndex) are
+    scored from those without encoding anything. Returns
+    {subreddit: (keyword_hits, sims)} where keyword_hits is a bool array and
+    sims holds each post's max keyword similarity (-inf when not computed).
+    Pass a shared KeywordMatcher to reuse it; with count_hits on, it accumulates hit counts.
+    """
+    if matcher is None:
+        matcher = KeywordMatcher(keyword_list)
+    embeddings_by_sub = embeddings_by_sub or {}
+    results = {}
+    pending_texts = []
+    pending_slots = []
+
+    for sub, texts in texts_by_sub.items():
+        keyword_hits = np.zeros(len(texts), dtype=bool)
+        sims = np.full(len(texts), -np.inf, dtype=np.float32)
+        stored = embeddings_by_sub.get(sub)
+        for i, text in enumerate(texts):
+            if matcher.check(text):
+                keyword_hits[i] = True
+            elif use_semantics and stored is None:
+                pending_texts.append(text)
+                pending_slots.append((sub, i))
+        if use_semantics and stored is not None and not keyword_hits.all():
+            rest = ~keyword_hits
+            sims[rest] = (normalize_rows(stored[rest]) @ normalize_rows(keyword_embeddings).T).max(axis=1)
+        results[sub] = (keyword_hits, sims)
+
+    if pending_texts:
+        batch_sims = max_keyword_similarity(pending_texts, keyword_embeddings)
+        for (sub, i), sim in zip(pending_slots, batch_sims):
+            results[sub][1][i] = sim
+
+    if instrumentation.enabled():
+        instrumentation.count("relevance.posts_scored", sum(len(texts) for texts in texts_by_sub.values()))
+        instrumentation.count("relevance.keyword_hits", sum(int(hits.sum()) for hits, _ in results.values()))
+    return results
+
+
+def relevance_passes(
+    subreddit,
+    keyword_hits,
+    sims,
     min_posts=MIN_KEYWORD_POSTS,
     min_ratio=MIN_RATIO,
-    use_semantics=True,
     sim_threshold=SEMANTIC_SIM_THRESHOLD
 ):
-    """Check subreddit relevance with configurable semantic threshold"""
-    sub_inst = reddit.subreddit(subreddit)
-    matching_count = 0
-    total_count = 0
-    
-    for p in sub_inst.new(limit=100):
-        total_count += 1
-        post_text = (p.title or "") + " " + (p.selftext or "")
-        match_found = False
-
-        # Traditional keyword match
-        for kw in keyword_list:
-            if kw.lower() in post_text.lower():
-                match_found = True
-                break
-
-        # Semantic context match
-        if not match_found and use_semantics:
-            post_emb = model.encode(post_text)
-            sims = cosine_similarity(np.array([post_emb]), keyword_embeddings)
-            if np.max(sims) > sim_threshold:
-                match_found = True
-
-        if match_found:
-            matching_count += 1
+    """Apply the post count and ratio thresholds to a scored subreddit"""
+    matching_count = int(np.count_nonzero(keyword_hits | (sims > sim_threshold)))
+    total_count = len(keyword_hits)
 
     print(f"r/{subreddit}: {matching_count} relevant posts / {total_count} recent posts")
     if total_count == 0:
         return False
-    
+
     ratio = matching_count / total_count
     passes = matching_count >= min_posts and ratio >= min_ratio
     print(f"r/{subreddit}: relevance passes: {passes} (min_posts={min_posts}, min_ratio={min_ratio})")
     return passes
 
 
-def get_communities_section_subs(keyword, exclude_subs, max_subs=25):
-    # Use Reddit's public API for communities tab results
-    url = f"https://www.reddit.com/subreddits/search.json?q={keyword}"
-    headers = {'User-Agent': 'Mozilla/5.0'}
-    resp = requests.get(url, headers=headers)
-    subs = []
-    exclude_set = set([s.lower() for s in exclude_subs])
+def check_subreddit_relevance(
+    subreddit,
+    keyword_list,
+    keyword_embeddings,
+    min_posts=MIN_KEYWORD_POSTS,
+    min_ratio=MIN_RATIO,
+    use_semantics=True,
+    sim_threshold=SEMANTIC_SIM_THRESHOLD,
+    matcher=None
+):
+    """Check subreddit relevance with configurable semantic threshold"""
+    texts = fetch_subreddit_texts(subreddit)
+    scores = score_subreddit_texts(
+        {subreddit: texts}, keyword_list, keyword_embeddings, use_semantics, matcher=matcher
+    )
+    keyword_hits, sims = scores[subreddit]
+    return relevance_passes(
+        subreddit,
+        keyword_hits,
+        sims,
+        min_posts=min_posts,
+        min_ratio=min_ratio,
+        sim_threshold=sim_threshold
+    )
+
+
+def discover_relevant_subs(
+    candidate_subs,
+    keyword_list,
+    keyword_embeddings,
+    desired_count=DESIRED_COUNT,
+    max_workers=DISCOVERY_WORKERS,
+    min_posts=MIN_KEYWORD_POSTS,
+    min_ratio=MIN_RATIO,
+    use_semantics=True,
+    sim_threshold=SEMANTIC_SIM_THRESHOLD,
+    matcher=None,
+    reddit_client=None,
+    on_accept=None,
+    index=None,
+    client_factory=None
+):
+    """
+    Check candidate subreddits concurrently and return those that pass.
+
+    A bounded pool prefetches up to 2 * max_workers listings ahead of the
+    scorer. Listings that are already downloaded are scored together in one
+    embedding batch, and decisions are made in candidate order, so the result
+    is the same as checking the candidates one at a time. No new listings are
+    requested once desired_count subreddits have passed.
+
+    on_accept(sub) is called as soon as a subreddit passes, so a caller can
+    start working on it while the remaining candidates are still checked.
+
+    With a SubredditIndex, fresh entries are scored from their stored
+    embeddings without touching the network. Fetched subreddits have all
+    their posts embedded and stored, and every outcome is recorded.
+
+    PRAW clients are not thread-safe, so every fetch worker borrows a client
+    of its own from client_factory (by default a shared pool of clients
+    like get_reddit(), reused across calls). A
+    caller-supplied reddit_client without a factory is used by a single
+    fetch worker.
+    """
+    if matcher is None:
+        matcher = KeywordMatcher(keyword_list)
+    if client_factory is not None:
+        clients = RedditClientPool(client_factory)
+    elif reddit_client is None:
+        clients = get_worker_clients()
+    else:
+        clients = None
+    if clients is None:
+        max_workers = 1
+    final_subs = []
+    unique_subs = iter(dict.fromkeys(candidate_subs))
+    window = max(1, max_workers) * 2
+    pending = deque()
+
+    def load(sub):
+        if clients is None:
+            return load_subreddit_texts(sub, reddit_client, index)
+        client = clients.acquire()
+        try:
+            return load_subreddit_texts(sub, client, index)
+        finally:
+            clients.release(client)
+
+    def fill(pool):
+        while len(pending) < window and len(final_subs) < desired_count:
+            sub = next(unique_subs, None)
+            if sub is None:
+                return
+            pending.append((sub, pool.submit(load, sub)))
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        fill(pool)
+        while pending and len(final_subs) < desired_count:
+            batch = [pending.popleft()]
+            while pending and pending[0][1].done():
+                batch.append(pending.popleft())
+
+            texts_by_sub = {}
+            embeddings_by_sub = {}
+            for sub, future in batch:
+                try:
+                    texts_by_sub[sub], embeddings = future.result()
+                except Exception as e:
+                    print(f"Error fetching r/{sub}: {e}")
+                    continue
+                if embeddings is not None:
+                    embeddings_by_sub[sub] = embeddings
+
+            if index is not None:
+                fetched = [sub for sub in texts_by_sub if sub not in embeddings_by_sub]
+                texts = [text for sub in fetched for text in texts_by_sub[sub]]
+                vectors = encode_texts(texts) if texts else None
+                start = 0
+                for sub in fetched:
+                    count = len(texts_by_sub[sub])
+                    embeddings = vectors[start:start + count] if count else np.zeros((0, 0), dtype=np.float32)
+                    start += count
+                    index.put(sub, texts_by_sub[sub], embeddings)
+                    embeddings_by_sub[sub] = embeddings
+
+            scores = score_subreddit_texts(
+                texts_by_sub, keyword_list, keyword_embeddings, use_semantics,
+                matcher=matcher, embeddings_by_sub=embeddings_by_sub
+            )
+            for sub in texts_by_sub:
+                if len(final_subs) >= desired_count:
+                    break
+                keyword_hits, sims = scores[sub]
+                if index is not None:
+                    relevant = int(np.count_nonzero(keyword_hits | (sims > sim_threshold)))
+                    index.record_score(sub, keyword_list, int(keyword_hits.sum()), relevant, len(keyword_hits))
+                if relevance_passes(
+                    sub,
+                    keyword_hits,
+                    sims,
+                    min_posts=min_posts,
+                    min_ratio=min_ratio,
+                    sim_threshold=sim_threshold
+                ):
+                    final_subs.append(sub)
+                    print(f"Added r/{sub} to final list.\n")
+                    if on_accept is not None:
+                        on_accept(sub)
+            fill(pool)
+
+        for _, future in pending:
+            future.cancel()
+
+    return final_subs
+
+
+def get_communities_section_subs(keywords, exclude_subs, max_subs=25, client=None):
+    """
+    Subreddits from Reddit's Communities search for every keyword, ranked by
+    how many keywords returned them
+    """
+    if isinstance(keywords, str):
+        keywords = [keywords]
+    own_client = client is None
+    if own_client:
+        client = CommunitiesClient(user_agent=REDDIT_USER_AGENT, cache=CommunitiesCache())
     try:
-        data = resp.json()
-        for child in data.get('data', {}).get('children', []):
-            subname = child.get('data', {}).get('display_name', '')
-            if subname and subname.lower() not in exclude_set and subname not in subs:
-                subs.append(subname)
-            if len(subs) == max_subs:
-                break
-    except Exception as e:
-        print(f"Error retrieving communities API: {e}")
+        subs = client.ranked_subreddits(keywords, exclude_subs, max_subs=max_subs, max_pages=COMMUNITIES_PAGES)
+        print(client.report())
+    finally:
+        if own_client:
+            client.close()
     return subs
 
 
@@ -229,26 +568,19 @@ def get_communities_section_subs(keyword, exclude_subs, max_subs=25):
 # MAIN EXECUTION
 # ============================================
 
-if __name__ == "__main__":
-    print("=" * 70)
-    print(f"SUBREDDIT FINDER - Workflow: {WORKFLOW_MODE.upper()}")
-    print("=" * 70)
-    
+def select_keywords(workflow_mode=WORKFLOW_MODE):
+    """Build the keyword list and semantic threshold for a workflow mode"""
     # Initialize variables
     keyword_variants = []
     semantic_threshold = SEMANTIC_SIM_THRESHOLD
     
-    # ============================================
-    # WORKFLOW SELECTION
-    # ============================================
-    
-    if WORKFLOW_MODE == "manual":
+    if workflow_mode == "manual":
         # WORKFLOW 1: Manual keywords with spaCy variants
         print("\n📌 Workflow 1: Manual Keywords with spaCy Expansion")
         print(f"Input keywords: {KEYWORDS}")
         keyword_variants = get_word_variants(KEYWORDS)
         
-    elif WORKFLOW_MODE == "brand_context":
+    elif workflow_mode == "brand_context":
         # WORKFLOW 2: Brand context with spaCy variants
         print("\n📌 Workflow 2: Brand Context with spaCy Expansion")
         brand = BrandContext(
@@ -265,7 +597,7 @@ if __name__ == "__main__":
         
         keyword_variants = get_word_variants(base_keywords)
         
-    elif WORKFLOW_MODE == "auto_keywords":
+    elif workflow_mode == "auto_keywords":
         # WORKFLOW 3: Auto-generate keywords from brand context (NO spaCy)
         print("\n📌 Workflow 3: Auto-Generated Keywords from Brand Context")
         print("🔒 STRICT SEMANTIC MATCHING ENABLED")
@@ -286,10 +618,30 @@ if __name__ == "__main__":
         print(f"\n⚙️  Using STRICT semantic threshold: {semantic_threshold} (default: {SEMANTIC_SIM_THRESHOLD})")
     
     else:
-        print(f"❌ Unknown workflow mode: {WORKFLOW_MODE}")
+        raise ValueError(f"Unknown workflow mode: {workflow_mode}")
+
+    return keyword_variants, semantic_threshold
+
+
+def main(workflow_mode=WORKFLOW_MODE, dry_run=DRY_RUN):
+    print("=" * 70)
+    print(f"SUBREDDIT FINDER - Workflow: {workflow_mode.upper()}")
+    print("=" * 70)
+
+    # ============================================
+    # WORKFLOW SELECTION
+    # ============================================
+
+    if workflow_mode not in WORKFLOW_MODES:
+        print(f"❌ Unknown workflow mode: {workflow_mode}")
         print("   Valid modes: 'manual', 'brand_context', 'auto_keywords'")
         exit(1)
-    
+    keyword_variants, semantic_threshold = select_keywords(workflow_mode)
+
+    if dry_run:
+        print(f"\nDry run - {len(keyword_variants)} keywords: {keyword_variants}")
+        return []
+
     # ============================================
     # COMMON WORKFLOW (All modes)
     # ============================================
@@ -299,34 +651,29 @@ if __name__ == "__main__":
     print("=" * 70)
     
     # Create embeddings
-    keyword_embeddings = model.encode(keyword_variants)
+    keyword_embeddings = encode_texts(keyword_variants)
     print(f"\n✓ Created embeddings for {len(keyword_variants)} keywords")
+    keyword_matcher = KeywordMatcher(keyword_variants, count_hits=True)
     
-    # Fetch posts
-    posts = fetch_posts(keyword_variants, max_posts=150)
-    candidate_subs = ordered_unique_subs(posts)
+    # Find candidate subreddits
+    index = subreddit_index if USE_SUBREDDIT_INDEX else None
+    candidate_subs = fetch_candidate_subs(keyword_variants, max_posts=150, index=index)
+    if USE_POST_INDEX:
+        candidate_subs = list(dict.fromkeys(local_candidate_subs(keyword_embeddings) + candidate_subs))
 
     # Check relevance
     print(f"\nProcessing candidate subreddits for relevance threshold...")
     print(f"Semantic threshold: {semantic_threshold}")
-    final_subs = []
-    checked = set()
-    
-    for sub in candidate_subs:
-        if len(final_subs) >= DESIRED_COUNT:
-            break
-        if sub in checked:
-            continue
-        checked.add(sub)
-        
-        if check_subreddit_relevance(
-            sub, 
-            keyword_variants, 
-            keyword_embeddings,
-            sim_threshold=semantic_threshold  # Use workflow-specific threshold
-        ):
-            final_subs.append(sub)
-            print(f"Added r/{sub} to final list.\n")
+    final_subs = discover_relevant_subs(
+        candidate_subs,
+        keyword_variants,
+        keyword_embeddings,
+        desired_count=DESIRED_COUNT,
+        max_workers=DISCOVERY_WORKERS,
+        sim_threshold=semantic_threshold,  # Use workflow-specific threshold
+        matcher=keyword_matcher,
+        index=index
+    )
 
     # Display results
     print(f"\n{'=' * 70}")
@@ -335,9 +682,14 @@ if __name__ == "__main__":
     for idx, sub in enumerate(final_subs, 1):
         print(f"{idx}. r/{sub}")
 
-    # Find additional subreddits from Communities tab
-    primary_keyword = keyword_variants[0] if keyword_variants else "reddit"
-    communities_subs = get_communities_section_subs(primary_keyword, final_subs, max_subs=RELATED_COUNT)
+    print(f"\nMost frequent keyword hits: {keyword_matcher.hit_counts.most_common(10)}")
+    if USE_EMBEDDING_CACHE:
+        print(embedding_cache.report())
+    if index is not None:
+        print(index.report())
+
+    # Find additional subreddits from Communities tab, for every keyword
+    communities_subs = get_communities_section_subs(keyword_variants or ["reddit"], final_subs, max_subs=RELATED_COUNT)
     
     print(f"\nUp to {RELATED_COUNT} additional subreddits from Communities section:")
     for idx, sub in enumerate(communities_subs, 1):
@@ -346,3 +698,8 @@ if __name__ == "__main__":
     print("\n" + "=" * 70)
     print("✅ Done.")
     print("=" * 70)
+    return final_subs
+
+
+if __name__ == "__main__":
+    main()
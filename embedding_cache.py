@@ -0,0 +1,134 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+import instrumentation
+
+
+EMBEDDING_CACHE_PATH = os.path.join(".cache", "embeddings.sqlite")
+EMBEDDING_CACHE_MAX_ENTRIES = 200000
+
+
+class EmbeddingCache:
+    """
+    Persistent SQLite store of text embeddings shared across runs.
+
+    Rows are keyed by (model name, SHA-256 of the text), so switching models
+    never serves stale vectors. Vectors are stored as float32 blobs with a
+    last-used timestamp; once the store grows past max_entries the least
+    recently used rows are evicted. The connection is opened on first use.
+    """
+    def __init__(self, model_name, path=EMBEDDING_CACHE_PATH, max_entries=EMBEDDING_CACHE_MAX_ENTRIES):
+        self.model_name = model_name
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (model, key))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        return self._conn
+
+    @staticmethod
+    def text_key(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys):
+        """Return {key: vector} for the keys already in the store"""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({marks})",
+                    [self.model_name] + chunk
+                )
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND key = ?",
+                    [(now, self.model_name, key) for key in found]
+                )
+                conn.commit()
+        return found
+
+    def put_many(self, items):
+        """Store (key, vector) pairs and evict the oldest rows if over capacity"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, key, vector, last_used) VALUES (?, ?, ?, ?)",
+                [(self.model_name, key, np.asarray(vec, dtype=np.float32).tobytes(), now) for key, vec in items]
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            if count > self.max_entries:
+                conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            conn.commit()
+
+    def encode(self, model, texts, **encode_kwargs):
+        """
+        Return embeddings for texts, encoding only the ones not already cached.
+        A single string returns a 1-D vector, like model.encode.
+        """
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        keys = [self.text_key(t) for t in texts]
+        cached = self.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        misses = sum(1 for key in keys if key in missing)
+        self.hits += len(texts) - misses
+        self.misses += misses
+        instrumentation.count("embedding_cache.hits", len(texts) - misses)
+        instrumentation.count("embedding_cache.misses", misses)
+
+        if missing:
+            instrumentation.count("embeddings.encoded", len(missing))
+            with instrumentation.timer("embeddings.model_encode"):
+                new_vectors = model.encode(list(missing.values()), convert_to_numpy=True, **encode_kwargs)
+            new_items = list(zip(missing.keys(), np.asarray(new_vectors, dtype=np.float32)))
+            self.put_many(new_items)
+            cached.update(new_items)
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        vectors = np.vstack([cached[key] for key in keys])
+        return vectors[0] if single else vectors
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"Embedding cache ({self.model_name}): {self.hits} hits, {self.misses} misses ({rate:.0%} hit rate)"
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,130 @@
+"""
+Local stand-in for Reddit's /subreddits/search.json, for exercising
+CommunitiesClient offline. Results are deterministic per query and paged
+with `after`; responses carry X-Ratelimit-* headers for a small request
+budget per window, and every `fail_every`-th request can be answered with
+a 429 or 503 to exercise retries. Failed responses can carry a Retry-After
+header, as delay-seconds or as an HTTP-date (retry_after="http-date").
+"""
+import hashlib
+import json
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+SHARED_SUBREDDITS = ["sales", "SaaS", "Entrepreneur", "startups", "marketing", "smallbusiness"]
+
+
+class FakeCommunitiesServer:
+    def __init__(self, results_per_query=150, budget=100, window=60.0, fail_every=0, fail_status=429,
+                 latency=0.0, retry_after=None, host="127.0.0.1", port=0):
+        self.results_per_query = results_per_query
+        self.budget = budget
+        self.window = window
+        self.fail_every = fail_every
+        self.fail_status = fail_status
+        self.latency = latency
+        self.retry_after = retry_after
+        self.requests = []
+        self.user_agents = set()
+        self._window_start = time.time()
+        self._used = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def results(self, query):
+        """Every query shares a few popular subreddits, ranked differently, plus its own"""
+        seed = int(hashlib.md5(query.lower().encode("utf-8")).hexdigest(), 16)
+        shared = SHARED_SUBREDDITS[seed % len(SHARED_SUBREDDITS):] + SHARED_SUBREDDITS[:seed % len(SHARED_SUBREDDITS)]
+        own = [f"{query.replace(' ', '')}_{i}" for i in range(self.results_per_query - len(shared))]
+        return (own[:3] + shared + own[3:])[:self.results_per_query]
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != "/subreddits/search.json":
+                    self.send_error(404)
+                    return
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                fake._respond(self, params)
+
+        return Handler
+
+    def _respond(self, handler, params):
+        with self._lock:
+            now = time.time()
+            if now - self._window_start >= self.window:
+                self._window_start, self._used = now, 0
+            self._used += 1
+            self.requests.append(params)
+            self.user_agents.add(handler.headers.get("User-Agent", ""))
+            count = len(self.requests)
+            remaining = max(self.budget - self._used, 0)
+            reset = max(self.window - (now - self._window_start), 0)
+            over_budget = self._used > self.budget
+        time.sleep(self.latency)
+
+        headers = {
+            "X-Ratelimit-Used": str(self._used),
+            "X-Ratelimit-Remaining": str(remaining),
+            "X-Ratelimit-Reset": f"{reset:.0f}",
+        }
+        if over_budget or (self.fail_every and count % self.fail_every == 0):
+            status = 429 if over_budget else self.fail_status
+            body = json.dumps({"error": status}).encode()
+            if self.retry_after == "http-date":
+                headers["Retry-After"] = formatdate(time.time() + 1, usegmt=True)
+            elif self.retry_after is not None:
+                headers["Retry-After"] = str(self.retry_after)
+        else:
+            status = 200
+            names = self.results(params.get("q", ""))
+            limit = int(params.get("limit", 25))
+            start = int(params["after"].split("_")[-1]) if params.get("after") else 0
+            page = names[start:start + limit]
+            after = f"t5_{start + limit}" if start + limit < len(names) else None
+            body = json.dumps({
+                "kind": "Listing",
+                "data": {"after": after, "children": [{"kind": "t5", "data": {"display_name": n}} for n in page]},
+            }).encode()
+
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,129 @@
+"""
+Local stand-in for the Ollama HTTP API, for exercising the generation client
+offline. It serves /api/generate with either a streamed NDJSON reply or a
+single JSON object, and simulates prompt evaluation and per-token latency,
+optionally different for each model name. /api/tags lists every model in
+digests; change an entry to simulate pulling new weights.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOllamaServer:
+    def __init__(self, tokens=40, token_delay=0.005, prompt_delay=0.02, host="127.0.0.1", port=0, model_token_delays=None,
+                 digests=None):
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.model_token_delays = model_token_delays or {}
+        self.prompt_delay = prompt_delay
+        self.digests = dict(digests or {m: f"sha256:{m}-1" for m in ("llama3:latest", "mistral:latest", "phi3:latest")})
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path != "/api/tags":
+                    self.send_error(404)
+                    return
+                models = [{"name": name, "model": name, "digest": digest} for name, digest in fake.digests.items()]
+                body = json.dumps({"models": models}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if self.path != "/api/generate":
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                with fake._lock:
+                    fake.requests.append(payload)
+                fake._respond(self, payload)
+
+        return Handler
+
+    def _respond(self, handler, payload):
+        model = payload.get("model", "llama3")
+        token_delay = self.model_token_delays.get(model, self.token_delay)
+        prompt = payload.get("prompt", "")
+        context = payload.get("context") or []
+        # Tokens already held in the context are not evaluated again
+        prompt_tokens = len(prompt.split())
+        prompt_seconds = self.prompt_delay * prompt_tokens / 100
+        time.sleep(prompt_seconds)
+        pieces = [f"tok{i} " for i in range(self.tokens)]
+        new_context = list(context) + list(range(len(context), len(context) + prompt_tokens + self.tokens))
+        final = {
+            "model": model,
+            "response": "",
+            "done": True,
+            "context": new_context,
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_seconds * 1e9),
+            "eval_count": self.tokens,
+            "eval_duration": int(self.tokens * token_delay * 1e9),
+        }
+
+        if not payload.get("stream", True):
+            time.sleep(token_delay * self.tokens)
+            final["response"] = "".join(pieces)
+            body = json.dumps(final).encode()
+            handler.send_response(200)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+            return
+
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-ndjson")
+        handler.send_header("Transfer-Encoding", "chunked")
+        handler.end_headers()
+
+        def send(obj):
+            data = (json.dumps(obj) + "\n").encode()
+            handler.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            handler.wfile.flush()
+
+        for piece in pieces:
+            time.sleep(token_delay)
+            send({"model": model, "response": piece, "done": False})
+        send(final)
+        handler.wfile.write(b"0\r\n\r\n")
+        handler.wfile.flush()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -0,0 +1,210 @@
+"""
+Offline stand-in for the parts of praw.Reddit used by the scraper and the
+subreddit finder. Every simulated API call is counted and charged against a
+rate-limit window reported through auth.limits, like PRAW does.
+
+worker_client() returns another client on the same account (shared budget
+and counters), and concurrent_use counts requests made on a client while
+another thread was using it, which must stay 0 since PRAW is not thread-safe.
+"""
+import copy
+import random
+import threading
+import time
+
+
+LISTING_PAGE_SIZE = 100  # Items PRAW fetches per listing request
+
+
+class FakeAuth:
+    def __init__(self, reddit):
+        self._reddit = reddit
+
+    @property
+    def limits(self):
+        return self._reddit.limits()
+
+
+class _FakeAccount:
+    """Server-side state shared by every client logged in with the same credentials"""
+    def __init__(self, budget, window):
+        self.budget = budget
+        self.window = window
+        self.requests = 0
+        self.requests_by_kind = {}
+        self.concurrent_use = 0  # Requests issued on a client that another thread was using
+        self.submissions = {}
+        self.lock = threading.Lock()
+        self.window_start = time.time()
+        self.window_used = 0
+
+    def limits(self):
+        return {
+            "remaining": float(max(self.budget - self.window_used, 0)),
+            "reset_timestamp": self.window_start + self.window,
+            "used": self.window_used,
+        }
+
+
+class FakeReddit:
+    def __init__(self, posts_per_subreddit=100, comments_per_post=20, more_per_post=2,
+                 latency=0.0, budget=1000, window=600.0, seed=0, account=None):
+        self.posts_per_subreddit = posts_per_subreddit
+        self.comments_per_post = comments_per_post
+        self.more_per_post = more_per_post
+        self.latency = latency
+        self.budget = budget
+        self.window = window
+        self.seed = seed
+        self.auth = FakeAuth(self)
+        self._account = account or _FakeAccount(budget, window)
+        self._limits = None
+        self._busy = 0
+
+    @property
+    def requests(self):
+        return self._account.requests
+
+    @property
+    def requests_by_kind(self):
+        return self._account.requests_by_kind
+
+    @property
+    def concurrent_use(self):
+        return self._account.concurrent_use
+
+    def worker_client(self):
+        """Another client on the same account, like a second praw.Reddit with the same credentials"""
+        return FakeReddit(self.posts_per_subreddit, self.comments_per_post, self.more_per_post,
+                          self.latency, self.budget, self.window, self.seed, account=self._account)
+
+    def request(self, kind):
+        account = self._account
+        with account.lock:
+            if self._busy:
+                account.concurrent_use += 1
+            self._busy += 1
+            now = time.time()
+            if now - account.window_start >= account.window:
+                account.window_start = now
+                account.window_used = 0
+            account.window_used += 1
+            account.requests += 1
+            account.requests_by_kind[kind] = account.requests_by_kind.get(kind, 0) + 1
+            # Like PRAW, a client only knows the limits from its own latest response
+            self._limits = account.limits()
+        if self.latency:
+            time.sleep(self.latency)
+        with account.lock:
+            self._busy -= 1
+
+    def limits(self):
+        with self._account.lock:
+            return dict(self._limits) if self._limits else self._account.limits()
+
+    def subreddit(self, name):
+        return FakeSubreddit(self, name)
+
+    def submission(self, id):
+        """A lazy submission bound to this client; its comments are fetched on first access"""
+        with self._account.lock:
+            listed = self._account.submissions[id]
+        submission = copy.copy(listed)
+        submission._reddit = self
+        submission._comments = None
+        return submission
+
+
+class FakeSubreddit:
+    def __init__(self, reddit, name):
+        self._reddit = reddit
+        self.display_name = name
+
+    def _listing(self, kind, limit):
+        rng = random.Random(f"{self._reddit.seed}:{self.display_name}")
+        count = min(limit or self._reddit.posts_per_subreddit, self._reddit.posts_per_subreddit)
+        base_time = 1700000000
+        for i in range(count):
+            if i % LISTING_PAGE_SIZE == 0:
+                self._reddit.request(kind)
+            submission = FakeSubmission(self._reddit, self, i, rng, base_time - i * 3600)
+            with self._reddit._account.lock:
+                self._reddit._account.submissions[submission.id] = submission
+            yield submission
+
+    def top(self, time_filter="all", limit=100):
+        return self._listing("listing", limit)
+
+    def new(self, limit=100):
+        return self._listing("listing", limit)
+
+
+class FakeRedditor:
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+
+class FakeSubmission:
+    def __init__(self, reddit, subreddit, index, rng, created_utc):
+        self._reddit = reddit
+        self.subreddit = subreddit
+        self.id = f"{subreddit.display_name.lower()}{index:05d}"
+        self.title = f"Post {index} in r/{subreddit.display_name} about " + rng.choice(
+            ["lead generation", "cold emailing", "hiring", "pricing", "sales automation", "churn"]
+        )
+        self.selftext = " ".join(rng.choice(["we", "tried", "outbound", "tools", "data", "team"]) for _ in range(40))
+        self.url = f"https://reddit.com/r/{subreddit.display_name}/comments/{self.id}"
+        self.score = rng.randint(1, 5000)
+        self.upvote_ratio = round(rng.uniform(0.5, 1.0), 2)
+        self.num_comments = reddit.comments_per_post
+        self.created_utc = float(created_utc)
+        self.author = FakeRedditor(f"user{rng.randint(1, 500)}")
+        self.link_flair_text = rng.choice([None, "Question", "Discussion"])
+        self.permalink = f"/r/{subreddit.display_name}/comments/{self.id}/"
+        self._comments = None
+
+    @property
+    def comments(self):
+        if self._comments is None:
+            self._reddit.request("comments")
+            self._comments = FakeCommentForest(self._reddit, self)
+        return self._comments
+
+
+class FakeComment:
+    def __init__(self, submission, index):
+        self.id = f"{submission.id}c{index}"
+        self.parent_id = f"t3_{submission.id}" if index % 3 == 0 else f"t1_{submission.id}c{index - 1}"
+        self.body = f"Comment {index} on {submission.id}"
+        self.author = FakeRedditor(f"user{index % 50}")
+        self.score = index % 17
+        self.created_utc = submission.created_utc + 60 * (index + 1)
+        self.is_submitter = index % 10 == 0
+
+
+class FakeCommentForest:
+    """Comments are split evenly between the initial fetch and MoreComments nodes"""
+    def __init__(self, reddit, submission):
+        self._reddit = reddit
+        self._submission = submission
+        self._more_left = reddit.more_per_post
+        total = reddit.comments_per_post
+        self._loaded = total // (reddit.more_per_post + 1) if reddit.more_per_post else total
+
+    def replace_more(self, limit=32, threshold=0):
+        expanded = 0
+        while self._more_left and (limit is None or expanded < limit):
+            self._reddit.request("more_comments")
+            self._more_left -= 1
+            expanded += 1
+            if self._more_left == 0:
+                self._loaded = self._reddit.comments_per_post
+            else:
+                self._loaded += self._reddit.comments_per_post // (self._reddit.more_per_post + 1)
+        return []
+
+    def list(self):
+        return [FakeComment(self._submission, i) for i in range(self._loaded)]
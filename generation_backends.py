@@ -0,0 +1,170 @@
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+GENERATION_BACKENDS = ("ollama", "recorded")
+
+
+class GenerationResult:
+    """One completion with its timing: time-to-first-token, tokens/sec and total latency"""
+    def __init__(self, prompt, model):
+        self.prompt = prompt
+        self.model = model
+        self.text = ""
+        self.chunks = 0
+        self.ttft = None
+        self.total_latency = None
+        self.eval_count = None
+        self.eval_duration = None
+        self.prompt_eval_count = None
+        self.prompt_eval_duration = None
+        self.context = None
+        self.cached = False
+        self.error = None
+
+    @property
+    def tokens_per_second(self):
+        # Prefer Ollama's own counters; fall back to streamed chunks over wall time
+        if self.eval_count and self.eval_duration:
+            return self.eval_count / (self.eval_duration / 1e9)
+        if self.chunks and self.total_latency and self.ttft is not None and self.total_latency > self.ttft:
+            return self.chunks / (self.total_latency - self.ttft)
+        return 0.0
+
+    def metrics(self):
+        return {
+            "model": self.model,
+            "ttft": self.ttft,
+            "tokens_per_second": self.tokens_per_second,
+            "total_latency": self.total_latency,
+            "eval_count": self.eval_count,
+            "prompt_eval_count": self.prompt_eval_count,
+            "prompt_eval_seconds": self.prompt_eval_duration / 1e9 if self.prompt_eval_duration else None,
+            "output_chars": len(self.text),
+            "cached": self.cached,
+            "error": self.error,
+        }
+
+    def summary(self):
+        if self.cached:
+            return f"{self.model}: served from cache"
+        if self.error:
+            return f"{self.model}: failed after {self.total_latency or 0:.2f}s ({self.error})"
+        return (
+            f"{self.model}: first token {self.ttft or 0:.2f}s, {self.tokens_per_second:.1f} tokens/s, "
+            f"total {self.total_latency:.2f}s"
+        )
+
+
+class GenerationBackend:
+    """
+    Interface for text generation backends used by ContentGen.
+
+    Subclasses implement generate(); generate_many() runs prompts on a
+    bounded thread pool and returns results in prompt order.
+    on_token(index, piece) receives streamed chunks.
+    """
+    model = None
+    parallelism = 1
+
+    def generate(self, prompt, on_token=None, model=None, options=None, prefix=None, force=False):
+        raise NotImplementedError
+
+    def generate_many(self, prompts, on_token=None, model=None, options=None, prefix=None, force=False):
+        def run(index, prompt):
+            callback = None
+            if on_token is not None:
+                callback = lambda piece: on_token(index, piece)
+            return self.generate(prompt, on_token=callback, model=model, options=options, prefix=prefix, force=force)
+
+        with ThreadPoolExecutor(max_workers=max(1, self.parallelism)) as pool:
+            futures = [pool.submit(run, i, prompt) for i, prompt in enumerate(prompts)]
+            return [future.result() for future in futures]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _recording_key(model, prompt):
+    return model + ":" + hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class RecordedBackend(GenerationBackend):
+    """
+    Replays completions captured by RecordingBackend, for offline runs.
+
+    Recorded timings are reported as-is; with replay_timing=True the
+    recorded latency is also slept. Unknown prompts return an error result.
+    """
+    def __init__(self, path, model=None, parallelism=1, replay_timing=False):
+        with open(path, "r", encoding="utf-8") as f:
+            self.recordings = json.load(f)
+        self.model = model
+        self.parallelism = parallelism
+        self.replay_timing = replay_timing
+
+    def generate(self, prompt, on_token=None, model=None, options=None, prefix=None, force=False):
+        model = model or self.model
+        full_prompt = (prefix or "") + prompt
+        result = GenerationResult(full_prompt, model)
+        entry = self.recordings.get(_recording_key(model, full_prompt))
+        if entry is None:
+            result.error = "no recording for this model and prompt"
+            result.total_latency = 0.0
+            return result
+        for field in ("text", "chunks", "ttft", "total_latency", "eval_count", "eval_duration",
+                      "prompt_eval_count", "prompt_eval_duration"):
+            setattr(result, field, entry.get(field))
+        if self.replay_timing and result.total_latency:
+            time.sleep(result.total_latency)
+        if on_token is not None:
+            on_token(result.text)
+        return result
+
+
+class RecordingBackend(GenerationBackend):
+    """Wraps a live backend and saves every successful completion for RecordedBackend"""
+    def __init__(self, backend, path):
+        self.backend = backend
+        self.path = path
+        self.model = backend.model
+        self.parallelism = backend.parallelism
+        self.recordings = {}
+
+    def generate(self, prompt, on_token=None, model=None, options=None, prefix=None, force=False):
+        result = self.backend.generate(prompt, on_token=on_token, model=model, options=options, prefix=prefix, force=True)
+        if result.error is None:
+            self.recordings[_recording_key(result.model, (prefix or "") + prompt)] = {
+                "text": result.text,
+                "chunks": result.chunks,
+                "ttft": result.ttft,
+                "total_latency": result.total_latency,
+                "eval_count": result.eval_count,
+                "eval_duration": result.eval_duration,
+                "prompt_eval_count": result.prompt_eval_count,
+                "prompt_eval_duration": result.prompt_eval_duration,
+            }
+        return result
+
+    def close(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.recordings, f, indent=2, ensure_ascii=False)
+        self.backend.close()
+
+
+def create_backend(kind, model, **kwargs):
+    """Build a backend by name: "ollama" (kwargs go to OllamaClient) or "recorded" (path=...)"""
+    if kind == "ollama":
+        from ollama_client import OllamaClient
+        return OllamaClient(model=model, **kwargs)
+    if kind == "recorded":
+        return RecordedBackend(model=model, **kwargs)
+    raise ValueError(f"Unknown generation backend: {kind} (valid: {', '.join(GENERATION_BACKENDS)})")
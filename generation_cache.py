@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import instrumentation
+
+
+GENERATION_CACHE_PATH = os.path.join(".cache", "generations.sqlite")
+GENERATION_CACHE_TTL = 7 * 24 * 3600  # Seconds before a cached completion is regenerated
+GENERATION_CACHE_MAX_ENTRIES = 2000
+
+
+def generation_key(model, options, prompt, prefix=None):
+    """Hash of everything that determines a completion"""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    prefix_hash = hashlib.sha256(prefix.encode("utf-8")).hexdigest() if prefix else None
+    raw = json.dumps([model, options or {}, prefix_hash, prompt_hash], sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """
+    Persistent SQLite cache of LLM completions and of Ollama prompt contexts.
+
+    Completions are keyed on the model, the generation options and a hash of
+    the rendered prompt. Contexts are the token state Ollama returns after a
+    shared prompt prefix, so the prefix is evaluated once and reused. Entries
+    older than ttl are ignored and purged; beyond max_entries per table the
+    least recently used rows are evicted.
+    """
+    def __init__(self, path=GENERATION_CACHE_PATH, ttl=GENERATION_CACHE_TTL, max_entries=GENERATION_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            for table in ("generations", "contexts"):
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    " key TEXT PRIMARY KEY, model TEXT NOT NULL, value TEXT NOT NULL,"
+                    " created REAL NOT NULL, last_used REAL NOT NULL)"
+                )
+        return self._conn
+
+    def _get(self, table, key):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(f"DELETE FROM {table} WHERE created < ?", (now - self.ttl,))
+            row = conn.execute(f"SELECT value FROM {table} WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute(f"UPDATE {table} SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+        return json.loads(row[0]) if row is not None else None
+
+    def _put(self, table, key, model, value):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?, ?)",
+                (key, model, json.dumps(value), now, now)
+            )
+            (count,) = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()
+            if count > self.max_entries:
+                conn.execute(
+                    f"DELETE FROM {table} WHERE key IN "
+                    f"(SELECT key FROM {table} ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            conn.commit()
+
+    def get_generation(self, key):
+        value = self._get("generations", key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        instrumentation.count("generation_cache.misses" if value is None else "generation_cache.hits")
+        return value
+
+    def put_generation(self, key, model, text, metrics):
+        self._put("generations", key, model, {"text": text, "metrics": metrics})
+
+    def get_context(self, key):
+        return self._get("contexts", key)
+
+    def put_context(self, key, model, context):
+        self._put("contexts", key, model, context)
+
+    def report(self):
+        return f"Generation cache: {self.hits} hits, {self.misses} misses"
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
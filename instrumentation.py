@@ -0,0 +1,201 @@
+"""
+Timers and counters for the hot paths of all three tools.
+
+Off by default; while off, timer() returns a shared no-op context manager
+and count()/add_time() return after one flag check, so the calls can stay
+in hot loops. Turn it on from the environment, without code changes:
+
+  BREDDIT_REPORT=run_report.json python postscraper.py
+  BREDDIT_PROFILE=run.prof python ContentGen.py     # also dumps cProfile stats
+
+or from code with enable(report_path, profile_path). The report is written
+when the process exits. snapshot() returns the same structure at any time,
+e.g. for a monitoring endpoint in a long-lived process:
+
+  {"schema": 1, "tool": "postscraper.py", "started_at": <epoch>, "duration": <s>,
+   "timers": {"<name>": {"calls": n, "total": s, "mean": s, "max": s}},
+   "counters": {"<name>": n}}
+
+Names are dotted, grouped by what they measure: reddit.*, embeddings.*,
+spacy.*, llm.*, cache hits/misses as <cache>.hits / <cache>.misses.
+The profile covers the thread that called enable() (the main thread);
+worker-thread time shows up in the timers instead.
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+
+REPORT_SCHEMA = 1
+REPORT_ENV = "BREDDIT_REPORT"
+PROFILE_ENV = "BREDDIT_PROFILE"
+DEFAULT_REPORT_PATH = "run_report.json"
+
+_enabled = False
+_lock = threading.Lock()
+_timers = {}
+_counters = {}
+_started_at = time.time()
+_started = time.perf_counter()
+_report_path = None
+_profile_path = None
+_profiler = None
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        add_time(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def enabled():
+    return _enabled
+
+
+def timer(name):
+    """Context manager adding the elapsed time of its block to timer `name`"""
+    return _Timer(name) if _enabled else _NULL_TIMER
+
+
+def timed(name):
+    """Decorator form of timer()"""
+    def wrap(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return wrap
+
+
+def add_time(name, seconds, calls=1):
+    """Record a duration that was already measured"""
+    if not _enabled:
+        return
+    with _lock:
+        stats = _timers.get(name)
+        if stats is None:
+            stats = _timers[name] = [0, 0.0, 0.0]
+        stats[0] += calls
+        stats[1] += seconds
+        if seconds > stats[2]:
+            stats[2] = seconds
+
+
+def count(name, n=1):
+    if not _enabled or not n:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def snapshot():
+    """The current report as a dict (see module docstring for the schema)"""
+    with _lock:
+        timers = {
+            name: {"calls": calls, "total": round(total, 6), "mean": round(total / calls, 6) if calls else 0.0,
+                   "max": round(longest, 6)}
+            for name, (calls, total, longest) in sorted(_timers.items())
+        }
+        counters = dict(sorted(_counters.items()))
+    return {
+        "schema": REPORT_SCHEMA,
+        "tool": os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "python",
+        "started_at": _started_at,
+        "duration": round(time.perf_counter() - _started, 6),
+        "timers": timers,
+        "counters": counters,
+    }
+
+
+def reset():
+    global _started_at, _started
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+        _started_at = time.time()
+        _started = time.perf_counter()
+
+
+def write_report(path=None):
+    path = path or _report_path or DEFAULT_REPORT_PATH
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot(), f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def summary(limit=10):
+    """Short text summary: the slowest timers and every counter"""
+    report = snapshot()
+    slowest = sorted(report["timers"].items(), key=lambda item: -item[1]["total"])[:limit]
+    lines = [f"Run took {report['duration']:.1f}s"]
+    lines += [f"  {name}: {t['total']:.2f}s over {t['calls']} calls (max {t['max']:.2f}s)" for name, t in slowest]
+    lines += [f"  {name}: {value}" for name, value in report["counters"].items()]
+    return "\n".join(lines)
+
+
+def enable(report_path=None, profile_path=None):
+    """Start collecting; the report (and profile) are written at exit"""
+    global _enabled, _report_path, _profile_path, _profiler
+    first = not _enabled and _report_path is None
+    _enabled = True
+    _report_path = report_path or _report_path or DEFAULT_REPORT_PATH
+    if profile_path and _profiler is None:
+        import cProfile
+        _profile_path = profile_path
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    if first:
+        atexit.register(finish)
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def finish():
+    """Stop the profiler and write the report and profile; safe to call twice"""
+    global _profiler
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(_profile_path)
+        print(f"Profile written to {_profile_path} (python -m pstats {_profile_path})")
+        _profiler = None
+    if _enabled:
+        print(summary())
+        print(f"Run report written to {write_report()}")
+
+
+if os.environ.get(REPORT_ENV) or os.environ.get(PROFILE_ENV):
+    enable(os.environ.get(REPORT_ENV), os.environ.get(PROFILE_ENV))
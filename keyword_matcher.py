@@ -0,0 +1,56 @@
+from collections import Counter
+
+
+class KeywordMatcher:
+    """
+    Finds keywords contained in a text, built once per run.
+
+    Matching is case-insensitive substring matching, the same as
+    `kw.lower() in text.lower()`, but keywords are lowered once up front and
+    each text is lowered once per check instead of once per keyword.
+    str's substring search beats a combined regex at the list sizes the
+    finder uses (see bench_keyword_matcher.py).
+
+    check() is the accept/reject test: it stops at the first keyword found,
+    unless count_hits is on, in which case every keyword in a matching text
+    is recorded in hit_counts.
+    """
+    def __init__(self, keywords, count_hits=False):
+        self.keywords = list(keywords)
+        self.count_hits = count_hits
+        self._originals = {}
+        for kw in self.keywords:
+            lowered = kw.lower()
+            if lowered:
+                self._originals.setdefault(lowered, []).append(kw)
+        self._lowered = tuple(self._originals)
+        self.hit_counts = Counter()
+
+    def search(self, text):
+        """Return True if any keyword occurs in text"""
+        lowered_text = text.lower()
+        for kw in self._lowered:
+            if kw in lowered_text:
+                return True
+        return False
+
+    def matches(self, text):
+        """Return the set of keywords (as given) that occur in text"""
+        lowered_text = text.lower()
+        found = set()
+        for kw in self._lowered:
+            if kw in lowered_text:
+                found.update(self._originals[kw])
+        return found
+
+    def count(self, text):
+        """Record matches for text in hit_counts and return them"""
+        found = self.matches(text)
+        self.hit_counts.update(found)
+        return found
+
+    def check(self, text):
+        """Return True if any keyword occurs in text, counting hits when count_hits is on"""
+        if self.count_hits:
+            return bool(self.count(text))
+        return self.search(text)
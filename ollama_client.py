@@ -0,0 +1,206 @@
+import json
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+import instrumentation
+from generation_backends import GenerationBackend, GenerationResult
+from generation_cache import generation_key
+
+
+OLLAMA_URL = "http://localhost:11434"
+OLLAMA_MODEL = "llama3"
+OLLAMA_PARALLELISM = 4  # Concurrent generations in generate_many
+OLLAMA_TIMEOUT = (5, 600)  # (connect, read) seconds; read is per streamed chunk
+PREFIX_PRIME_OPTIONS = {"num_predict": 1}  # Evaluate a shared prefix, generate as little as possible
+# Chat template around the user prompt, per model family, for raw requests.
+# A shared prefix is only primed and reused for families listed here; other
+# models get prefix + prompt in one ordinary request.
+PROMPT_TEMPLATES = {
+    "llama3": ("<|start_header_id|>user<|end_header_id|>\n\n", "<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n\n"),
+    "mistral": ("[INST] ", " [/INST]"),
+    "phi3": ("<|user|>\n", "<|end|>\n<|assistant|>\n"),
+}
+
+
+def prompt_template(model):
+    """(before, after) the user prompt for this model, or None if unknown"""
+    return PROMPT_TEMPLATES.get(model.split(":")[0])
+
+
+class OllamaClient(GenerationBackend):
+    """
+    Streaming backend for Ollama's /api/generate over one pooled HTTP session.
+
+    generate() streams tokens to an optional callback as they arrive;
+    generate_many() runs several prompts on a bounded thread pool that
+    shares the session's connection pool.
+
+    With a GenerationCache, completions for an identical model, options and
+    prompt are served from the cache unless force=True. A shared prefix
+    (e.g. the customer context block) is evaluated once per model; its
+    returned context is stored and sent with every prompt that follows it.
+
+    Prefix requests are raw, with the model's template from PROMPT_TEMPLATES
+    written out: the prefix is primed as the opening of the user turn, the
+    token generated while priming is dropped from the context, and the
+    prompt completes the turn. Stored contexts are token IDs, so they are
+    keyed by the model's digest and only persisted when it is known.
+    """
+    def __init__(self, base_url=OLLAMA_URL, model=OLLAMA_MODEL, parallelism=OLLAMA_PARALLELISM,
+                 timeout=OLLAMA_TIMEOUT, cache=None):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.parallelism = max(1, parallelism)
+        self.timeout = timeout
+        self.cache = cache
+        self._contexts = {}
+        self._digests = {}
+        self._prefix_locks = {}
+        self._prefix_locks_guard = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.parallelism)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def generate(self, prompt, on_token=None, model=None, options=None, context=None, prefix=None, force=False):
+        """
+        Stream one completion; on_token(piece) is called for every chunk.
+        prefix is leading prompt text evaluated once and reused via its context;
+        force skips the cache lookup (the fresh result is still cached).
+        """
+        model = model or self.model
+        key = None
+        if self.cache is not None and context is None:
+            key = generation_key(model, options, prompt, prefix)
+            if not force:
+                cached = self.cache.get_generation(key)
+                if cached is not None:
+                    result = GenerationResult(prompt, model)
+                    result.text = cached["text"]
+                    result.cached = True
+                    result.ttft = result.total_latency = 0.0
+                    if on_token is not None:
+                        on_token(result.text)
+                    return result
+
+        raw = False
+        if prefix:
+            context = self.prefix_context(prefix, model)
+            if context is None:
+                prompt = prefix + prompt  # No template or priming failed; send the whole prompt
+            else:
+                prompt = prompt + prompt_template(model)[1]
+                raw = True
+
+        result = self._stream(prompt, on_token, model, options, context, raw)
+        if key is not None and result.error is None:
+            self.cache.put_generation(key, model, result.text, result.metrics())
+        return result
+
+    def model_digest(self, model=None):
+        """Digest of the local model from /api/tags, or None if it can't be determined"""
+        model = model or self.model
+        if model in self._digests:
+            return self._digests[model]
+        names = {model} if ":" in model else {model, model + ":latest"}
+        digest = None
+        try:
+            resp = self.session.get(f"{self.base_url}/api/tags", timeout=self.timeout)
+            resp.raise_for_status()
+            for entry in resp.json().get("models", []):
+                if entry.get("name") in names or entry.get("model") in names:
+                    digest = entry.get("digest")
+                    break
+        except (requests.RequestException, ValueError):
+            pass
+        self._digests[model] = digest
+        return digest
+
+    def prefix_context(self, prefix, model=None):
+        """
+        Return Ollama's context holding just the templated prefix, computing it
+        at most once per model digest; None if the model has no known template
+        or priming failed
+        """
+        model = model or self.model
+        template = prompt_template(model)
+        if template is None:
+            return None
+        digest = self.model_digest(model)
+        prompt = template[0] + prefix
+        key = generation_key(f"{model}@{digest}", PREFIX_PRIME_OPTIONS, prompt)
+        with self._prefix_locks_guard:
+            lock = self._prefix_locks.setdefault(key, threading.Lock())
+        with lock:
+            context = self._contexts.get(key)
+            if context is None and self.cache is not None and digest is not None:
+                context = self.cache.get_context(key)
+            if context is None:
+                primed = self._stream(prompt, None, model, PREFIX_PRIME_OPTIONS, None, raw=True)
+                if primed.error or not primed.context:
+                    return None
+                # The context ends with the token generated while priming; keep only the prefix
+                context = primed.context[:len(primed.context) - (primed.eval_count or 0)]
+                if not context:
+                    return None
+                if self.cache is not None and digest is not None:
+                    self.cache.put_context(key, model, context)
+            self._contexts[key] = context
+            return context
+
+    def _stream(self, prompt, on_token, model, options, context, raw=False):
+        result = GenerationResult(prompt, model)
+        payload = {"model": model, "prompt": prompt, "stream": True}
+        if raw:
+            payload["raw"] = True
+        if options:
+            payload["options"] = options
+        if context:
+            payload["context"] = context
+
+        started = time.perf_counter()
+        try:
+            with self.session.post(
+                f"{self.base_url}/api/generate", json=payload, stream=True, timeout=self.timeout
+            ) as resp:
+                resp.raise_for_status()
+                for line in resp.iter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise RuntimeError(chunk["error"])
+                    piece = chunk.get("response", "")
+                    if piece:
+                        if result.ttft is None:
+                            result.ttft = time.perf_counter() - started
+                        result.text += piece
+                        result.chunks += 1
+                        if on_token is not None:
+                            on_token(piece)
+                    if chunk.get("done"):
+                        result.eval_count = chunk.get("eval_count")
+                        result.eval_duration = chunk.get("eval_duration")
+                        result.prompt_eval_count = chunk.get("prompt_eval_count")
+                        result.prompt_eval_duration = chunk.get("prompt_eval_duration")
+                        result.context = chunk.get("context")
+        except (requests.RequestException, ValueError, RuntimeError) as e:
+            result.error = str(e)
+        result.total_latency = time.perf_counter() - started
+        if instrumentation.enabled():
+            instrumentation.count("llm.requests")
+            instrumentation.add_time("llm.generate", result.total_latency)
+            if result.error:
+                instrumentation.count("llm.errors")
+            if result.ttft is not None:
+                instrumentation.add_time("llm.first_token", result.ttft)
+            if result.prompt_eval_duration:
+                instrumentation.add_time("llm.prompt_eval", result.prompt_eval_duration / 1e9)
+            instrumentation.count("llm.prompt_tokens", result.prompt_eval_count or 0)
+            instrumentation.count("llm.tokens", result.eval_count or 0)
+        return result
+
+    def close(self):
+        self.session.close()
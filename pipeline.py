@@ -0,0 +1,307 @@
+"""
+End-to-end workflow: discover -> scrape -> analyze -> generate.
+
+Each stage runs on its own thread(s) and hands work to the next through a
+bounded queue, so a subreddit is scraped as soon as discovery accepts it and
+is analyzed and generated for while discovery is still checking the rest.
+A full queue blocks the stage feeding it, which keeps fast stages from
+running far ahead of slow ones. Stages hand off whole subreddits: analysis
+starts once a subreddit's scrape file is written, not per post, so every
+stage reads a complete, resumable file.
+
+Every stage persists its output under PIPELINE_DIR and skips subreddits that
+already have one, so an interrupted run resumes where it stopped:
+  discovered.json         accepted subreddits (complete once discovery ends)
+  scraped/<sub>.json      posts and comments, as written by postscraper.py
+  stats/<sub>.json        StyleStats.to_dict()
+  generated/<sub>.json    generated templates and generation metrics
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+import ContentGen
+import instrumentation
+import contextsubredditfinder as finder
+from post_store import POST_STORE_PATH, PostStore
+from postscraper import POSTS_LIMIT, RateLimitScheduler, make_reddit, reddit, save_to_json, scrape_subreddit_top_posts
+from post_index import PostIndex, add_scrape_file
+from reddit_clients import RedditClientPool
+from style_stats import StyleStats, analyze_file
+
+
+PIPELINE_DIR = "pipeline"
+PIPELINE_QUEUE_SIZE = 4  # Subreddits waiting between two stages
+PIPELINE_SUBREDDITS = []  # Skip discovery and run the other stages on these
+WORKFLOW_MODE = finder.WORKFLOW_MODE
+
+_DONE = object()  # End-of-stream marker passed down the queues
+
+
+def _write_json(path, data):
+    """Write via a temporary file so a crash never leaves a partial stage output"""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class Stage:
+    """
+    A pipeline stage: `workers` threads take subreddits from inbox, call
+    work(sub) and pass the subreddit on to outbox when it returns True.
+    A failure is reported and drops that subreddit only. The end-of-stream
+    marker is forwarded once the last worker has finished.
+    """
+    def __init__(self, name, work, inbox, outbox=None, workers=1):
+        self.name = name
+        self.work = work
+        self.inbox = inbox
+        self.outbox = outbox
+        self.workers = max(1, workers)
+        self.done = []
+        self.skipped = []
+        self.failed = []
+        self.busy = 0.0
+        self._active = self.workers
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _run(self):
+        while True:
+            sub = self.inbox.get()
+            if sub is _DONE:
+                self.inbox.put(_DONE)  # Let sibling workers see it too
+                break
+            started = time.perf_counter()
+            try:
+                passed = self.work(sub)
+            except Exception as e:
+                print(f"[{self.name}] r/{sub} failed: {e}")
+                passed = False
+                with self._lock:
+                    self.failed.append(sub)
+            elapsed = time.perf_counter() - started
+            instrumentation.add_time(f"pipeline.{self.name}", elapsed)
+            with self._lock:
+                self.busy += elapsed
+            if passed and self.outbox is not None:
+                self.outbox.put(sub)
+        with self._lock:
+            self._active -= 1
+            last = self._active == 0
+        if last and self.outbox is not None:
+            self.outbox.put(_DONE)
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def record(self, sub, skipped):
+        with self._lock:
+            (self.skipped if skipped else self.done).append(sub)
+
+    def summary(self):
+        return (f"{self.name:<9} {len(self.done):>3} done, {len(self.skipped):>3} resumed, "
+                f"{len(self.failed):>3} failed, {self.busy:6.1f}s busy")
+
+
+class Pipeline:
+    """
+    Wires the four stages together. reddit_client and client (a generation
+    backend) can be injected; by default the tools' own clients are used.
+    Scrape workers each use their own Reddit client, from
+    reddit_client_factory (make_reddit by default); an injected reddit_client
+    without a factory scrapes one post at a time.
+    Scraped posts are added to the finder's PostIndex during analysis when
+    USE_POST_INDEX is on, so later discovery runs can propose them; an
+    indexing failure is reported but doesn't stop the subreddit.
+    """
+    def __init__(self, output_dir=PIPELINE_DIR, queue_size=PIPELINE_QUEUE_SIZE, posts_limit=POSTS_LIMIT,
+                 reddit_client=None, client=None, store=None, post_index=None, reddit_client_factory=None):
+        self.output_dir = output_dir
+        self.queue_size = queue_size
+        self.posts_limit = posts_limit
+        self.reddit_client = reddit_client
+        self.reddit_client_factory = reddit_client_factory
+        self.client = client
+        self.store = store
+        self.post_index = post_index
+        self.subreddits = []
+        for name in ("scraped", "stats", "generated"):
+            os.makedirs(os.path.join(output_dir, name), exist_ok=True)
+
+    def path(self, kind, sub):
+        return os.path.join(self.output_dir, kind, f"{sub}.json")
+
+    @property
+    def discovered_path(self):
+        return os.path.join(self.output_dir, "discovered.json")
+
+    # ---------- Stage 1: discovery ----------
+    def discover(self, emit, workflow_mode=WORKFLOW_MODE, subreddits=None):
+        """Emit accepted subreddits one by one, replaying a completed earlier discovery"""
+        if subreddits:
+            for sub in subreddits:
+                emit(sub)
+            return
+        state = {"workflow_mode": workflow_mode, "subreddits": [], "complete": False}
+        if os.path.exists(self.discovered_path):
+            saved = _read_json(self.discovered_path)
+            if saved.get("workflow_mode") == workflow_mode and saved.get("complete"):
+                print(f"Resuming: {len(saved['subreddits'])} subreddits from {self.discovered_path}")
+                for sub in saved["subreddits"]:
+                    emit(sub)
+                return
+
+        def accept(sub):
+            state["subreddits"].append(sub)
+            _write_json(self.discovered_path, state)
+            emit(sub)
+
+        keyword_variants, semantic_threshold = finder.select_keywords(workflow_mode)
+        keyword_embeddings = finder.encode_texts(keyword_variants)
+        index = finder.subreddit_index if finder.USE_SUBREDDIT_INDEX else None
+        candidate_subs = finder.fetch_candidate_subs(keyword_variants, max_posts=150, index=index)
+        if finder.USE_POST_INDEX:
+            candidate_subs = list(dict.fromkeys(finder.local_candidate_subs(keyword_embeddings) + candidate_subs))
+        finder.discover_relevant_subs(
+            candidate_subs,
+            keyword_variants,
+            keyword_embeddings,
+            sim_threshold=semantic_threshold,
+            matcher=finder.KeywordMatcher(keyword_variants),
+            on_accept=accept,
+            index=index
+        )
+        state["complete"] = True
+        _write_json(self.discovered_path, state)
+
+    # ---------- Stage 2: scraping ----------
+    def scrape(self, sub):
+        path = self.path("scraped", sub)
+        if os.path.exists(path):
+            self.stages["scrape"].record(sub, skipped=True)
+            return True
+        posts = scrape_subreddit_top_posts(
+            sub, self.posts_limit, reddit_client=self._reddit_client, scheduler=self._scheduler, store=self.store,
+            client_pool=self._client_pool
+        )
+        tmp = path + ".tmp"
+        save_to_json(posts, sub, filename=tmp)
+        os.replace(tmp, path)
+        self.stages["scrape"].record(sub, skipped=False)
+        return True
+
+    # ---------- Stage 3: style analysis ----------
+    def analyze(self, sub):
+        path = self.path("stats", sub)
+        skipped = os.path.exists(path)
+        if not skipped:
+            _write_json(path, analyze_file(self.path("scraped", sub)).to_dict())
+        self.index_posts(sub)
+        self.stages["analyze"].record(sub, skipped=skipped)
+        return True
+
+    def index_posts(self, sub):
+        """Add a subreddit's scraped posts to the PostIndex; best effort, never blocks generation"""
+        if self.post_index is None or sub in self.post_index.subreddits:
+            return
+        try:
+            add_scrape_file(self.post_index, self.path("scraped", sub), finder.encode_texts, subreddit=sub)
+        except Exception as e:
+            print(f"[analyze] r/{sub}: not added to the post index: {e}")
+
+    # ---------- Stage 4: generation ----------
+    def generate(self, sub):
+        path = self.path("generated", sub)
+        if os.path.exists(path):
+            self.stages["generate"].record(sub, skipped=True)
+            return True
+        summary = StyleStats.from_dict(_read_json(self.path("stats", sub))).summary()
+        result = ContentGen.generate(self.client, summary, subreddit_name=sub)
+        if result.error:
+            raise RuntimeError(result.error)
+        _write_json(path, {"subreddit": sub, "text": result.text, "metrics": result.metrics()})
+        print(f"[generate] r/{sub}: {result.summary()}")
+        self.stages["generate"].record(sub, skipped=False)
+        return True
+
+    def run(self, workflow_mode=WORKFLOW_MODE, subreddits=None):
+        """Run every stage to completion; returns {sub: generated record} in discovery order"""
+        own_client = self.client is None
+        own_store = self.store is None
+        own_index = self.post_index is None and finder.USE_POST_INDEX
+        if own_client:
+            self.client = ContentGen.make_client()
+        if own_store:
+            self.store = PostStore(POST_STORE_PATH)
+        if own_index:
+            self.post_index = PostIndex.load_or_create(finder.EMBEDDING_MODEL_NAME)
+        self._reddit_client = self.reddit_client or reddit
+        self._scheduler = RateLimitScheduler(self._reddit_client)
+        self._client_pool = None
+        if self.reddit_client is None or self.reddit_client_factory is not None:
+            self._client_pool = RedditClientPool(self.reddit_client_factory or make_reddit)
+
+        to_scrape, to_analyze, to_generate = (queue.Queue(self.queue_size) for _ in range(3))
+        self.stages = {
+            "scrape": Stage("scrape", self.scrape, to_scrape, to_analyze),
+            "analyze": Stage("analyze", self.analyze, to_analyze, to_generate),
+            "generate": Stage("generate", self.generate, to_generate,
+                              workers=getattr(self.client, "parallelism", 1)),
+        }
+        started = time.perf_counter()
+        for stage in self.stages.values():
+            stage.start()
+
+        def emit(sub):
+            if sub not in self.subreddits:
+                self.subreddits.append(sub)
+                to_scrape.put(sub)  # Blocks while the scraper is queue_size behind
+
+        try:
+            self.discover(emit, workflow_mode, subreddits)
+        finally:
+            to_scrape.put(_DONE)
+            for stage in self.stages.values():
+                stage.join()
+            if own_store:
+                self.store.close()
+            if own_client:
+                self.client.close()
+            if own_index:
+                self.post_index.save()
+
+        print(f"\nPipeline finished in {time.perf_counter() - started:.1f}s")
+        for stage in self.stages.values():
+            print(stage.summary())
+        return {
+            sub: _read_json(self.path("generated", sub))
+            for sub in self.subreddits if os.path.exists(self.path("generated", sub))
+        }
+
+
+def run_pipeline(workflow_mode=WORKFLOW_MODE, subreddits=None, **kwargs):
+    return Pipeline(**kwargs).run(workflow_mode, subreddits)
+
+
+if __name__ == "__main__":
+    results = run_pipeline(WORKFLOW_MODE, PIPELINE_SUBREDDITS)
+    for sub, record in results.items():
+        print(f"\n===== r/{sub} =====")
+        print(record["text"])
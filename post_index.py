@@ -0,0 +1,283 @@
+"""
+Approximate nearest-neighbour index over scraped post embeddings.
+
+Build or extend it from scrape files:
+  python post_index.py scraped/*.json
+The subreddit of each file is taken from its name (scraped/<subreddit>.json).
+"""
+import json
+import os
+import sys
+
+import numpy as np
+
+import instrumentation
+from vector_math import normalize_rows
+
+
+POST_INDEX_DIR = os.path.join(".cache", "post_index")
+IVF_LISTS = 64  # Inverted lists (k-means cells); roughly sqrt of the post count works well
+IVF_PROBE = 8  # Lists scanned per query; higher means better recall, slower search
+IVF_TRAIN_ITERATIONS = 10
+IVF_RETRAIN_GROWTH = 4  # Re-cluster once the index is this many times larger than when trained
+MIN_TRAIN_POINTS_PER_LIST = 8  # Below n_lists * this, search is brute force
+
+
+def kmeans(vectors, k, iterations=IVF_TRAIN_ITERATIONS, seed=0):
+    """Spherical k-means on normalized vectors; returns normalized centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        empty = np.bincount(assign, minlength=k) == 0
+        # Reseed empty cells with random points so every list stays in use
+        sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class PostIndex:
+    """
+    IVF index of normalized post embeddings, each tagged with its subreddit.
+
+    Vectors are clustered with k-means into n_lists cells; a query only
+    scans the n_probe cells whose centroids are closest to it, so search
+    cost grows with n_probe / n_lists of the corpus instead of all of it.
+    Until there are enough posts to train, search is exact. New posts are
+    appended and assigned to the nearest existing centroid; once the index
+    has grown IVF_RETRAIN_GROWTH times past its training size it is
+    re-clustered. Posts already in the index (by post id) are skipped.
+
+    The index is saved as .npy arrays plus a JSON metadata file and loaded
+    memory-mapped, so opening a large index is cheap.
+    """
+    def __init__(self, model_name=None, n_lists=IVF_LISTS, n_probe=IVF_PROBE):
+        self.model_name = model_name
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.subreddits = []
+        self.post_ids = []
+        self.vectors = None
+        self.sub_ids = np.zeros(0, dtype=np.int32)
+        self.list_ids = np.zeros(0, dtype=np.int32)
+        self.centroids = None
+        self.trained_size = 0
+        self.dirty = False  # Changed since it was created, loaded or saved
+        self._sub_lookup = {}
+        self._seen_posts = set()
+        self._buffer = None
+        self._order = None
+        self._offsets = None
+        self._grouped = None
+
+    def __len__(self):
+        return len(self.post_ids)
+
+    @property
+    def trained(self):
+        return self.centroids is not None
+
+    def add(self, subreddit, post_ids, vectors):
+        """Insert a batch of posts from one subreddit; returns how many were new"""
+        vectors = normalize_rows(vectors)
+        keep = []
+        batch_ids = set()
+        for i, pid in enumerate(post_ids):
+            # Skip posts already indexed and repeats within this batch (first occurrence wins)
+            if pid not in self._seen_posts and pid not in batch_ids:
+                batch_ids.add(pid)
+                keep.append(i)
+        if not keep:
+            return 0
+        vectors = vectors[keep]
+        new_ids = [post_ids[i] for i in keep]
+
+        sub_id = self._sub_lookup.get(subreddit)
+        if sub_id is None:
+            sub_id = self._sub_lookup[subreddit] = len(self.subreddits)
+            self.subreddits.append(subreddit)
+
+        self._append(vectors)
+        self.sub_ids = np.concatenate([self.sub_ids, np.full(len(new_ids), sub_id, dtype=np.int32)])
+        self.post_ids.extend(new_ids)
+        self._seen_posts.update(new_ids)
+        self.dirty = True
+
+        if self.trained:
+            self.list_ids = np.concatenate([self.list_ids, self._assign(vectors)])
+        if self._needs_training():
+            self.train()
+        self._order = self._grouped = None
+        return len(new_ids)
+
+    def _append(self, vectors):
+        """Append rows into a buffer that doubles in capacity, so inserts stay amortized O(batch)"""
+        n = 0 if self.vectors is None else len(self.vectors)
+        if self._buffer is None or n + len(vectors) > len(self._buffer):
+            capacity = max(2 * (n + len(vectors)), 1024)
+            buffer = np.empty((capacity, vectors.shape[1]), dtype=np.float32)
+            if n:
+                buffer[:n] = self.vectors
+            self._buffer = buffer
+        self._buffer[n:n + len(vectors)] = vectors
+        self.vectors = self._buffer[:n + len(vectors)]
+
+    def _needs_training(self):
+        if len(self) < self.n_lists * MIN_TRAIN_POINTS_PER_LIST:
+            return False
+        return not self.trained or len(self) >= self.trained_size * IVF_RETRAIN_GROWTH
+
+    def train(self):
+        """(Re)cluster every vector currently in the index"""
+        vectors = np.asarray(self.vectors)
+        self.centroids = kmeans(vectors, min(self.n_lists, len(vectors)))
+        self.list_ids = self._assign(vectors)
+        self.trained_size = len(vectors)
+        self.dirty = True
+        self._order = self._grouped = None
+
+    def _assign(self, vectors):
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def _lists(self):
+        """
+        Row order grouped by list, each list's start offset, and a copy of the
+        vectors in that order so every list is one contiguous block
+        """
+        if self._order is None:
+            self._order = np.argsort(self.list_ids, kind="stable")
+            counts = np.bincount(self.list_ids, minlength=len(self.centroids))
+            self._offsets = np.concatenate([[0], np.cumsum(counts)])
+            self._grouped = np.asarray(self.vectors)[self._order]
+        return self._order, self._offsets, self._grouped
+
+    @instrumentation.timed("post_index.search")
+    def search(self, query_vectors, k=100, n_probe=None):
+        """
+        Return, for each query, (row indices, similarities) of its k most
+        similar posts, most similar first.
+        """
+        queries = normalize_rows(query_vectors)
+        if not len(self):
+            return [(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)) for _ in queries]
+        vectors = self.vectors
+        if not self.trained:
+            return [_top_k(np.arange(len(self)), vectors @ q, k) for q in queries]
+
+        order, offsets, grouped = self._lists()
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        probes = np.argpartition(-(queries @ self.centroids.T), n_probe - 1, axis=1)[:, :n_probe]
+        results = []
+        for q, cells in zip(queries, probes):
+            rows = np.concatenate([order[offsets[c]:offsets[c + 1]] for c in cells])
+            sims = np.concatenate([grouped[offsets[c]:offsets[c + 1]] @ q for c in cells])
+            results.append(_top_k(rows, sims, k))
+        return results
+
+    def top_subreddits(self, query_vectors, top_k=20, per_query=100, n_probe=None, exclude=()):
+        """
+        Rank subreddits by the summed similarity of their posts among each
+        query's per_query nearest posts. Returns [(subreddit, score), ...].
+        """
+        scores = np.zeros(len(self.subreddits), dtype=np.float64)
+        for rows, sims in self.search(query_vectors, per_query, n_probe):
+            np.add.at(scores, self.sub_ids[rows], np.maximum(sims, 0))
+        excluded = {s.lower() for s in exclude}
+        ranked = []
+        for sub_id in np.argsort(-scores, kind="stable"):
+            if scores[sub_id] <= 0 or len(ranked) >= top_k:
+                break
+            if self.subreddits[sub_id].lower() not in excluded:
+                ranked.append((self.subreddits[sub_id], float(scores[sub_id])))
+        return ranked
+
+    def save(self, directory=POST_INDEX_DIR):
+        """Write the index if it changed since it was loaded or last saved; returns whether it wrote"""
+        if not self.dirty:
+            return False
+        os.makedirs(directory, exist_ok=True)
+        arrays = {"vectors": self.vectors, "sub_ids": self.sub_ids, "list_ids": self.list_ids}
+        if self.trained:
+            arrays["centroids"] = self.centroids
+        for name, array in arrays.items():
+            if array is not None:
+                # A loaded index reads vectors.npy through a memory map, so never write over it in place
+                path = os.path.join(directory, f"{name}.npy")
+                with open(path + ".tmp", "wb") as f:
+                    np.save(f, np.ascontiguousarray(array))
+                os.replace(path + ".tmp", path)
+        meta = {
+            "model_name": self.model_name,
+            "n_lists": self.n_lists,
+            "n_probe": self.n_probe,
+            "trained_size": self.trained_size,
+            "subreddits": self.subreddits,
+            "post_ids": self.post_ids,
+        }
+        tmp = os.path.join(directory, "meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(directory, "meta.json"))
+        self.dirty = False
+        return True
+
+    @classmethod
+    def load(cls, directory=POST_INDEX_DIR):
+        with open(os.path.join(directory, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(meta["model_name"], meta["n_lists"], meta["n_probe"])
+        index.subreddits = meta["subreddits"]
+        index.post_ids = meta["post_ids"]
+        index.trained_size = meta["trained_size"]
+        index._sub_lookup = {name: i for i, name in enumerate(index.subreddits)}
+        index._seen_posts = set(index.post_ids)
+        if index.post_ids:
+            index.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+            index.sub_ids = np.load(os.path.join(directory, "sub_ids.npy"))
+            index.list_ids = np.load(os.path.join(directory, "list_ids.npy"))
+        centroids_path = os.path.join(directory, "centroids.npy")
+        if os.path.exists(centroids_path):
+            index.centroids = np.load(centroids_path)
+        return index
+
+    @classmethod
+    def load_or_create(cls, model_name, directory=POST_INDEX_DIR):
+        """Open the saved index for this embedding model, or start an empty one"""
+        if os.path.exists(os.path.join(directory, "meta.json")):
+            index = cls.load(directory)
+            if index.model_name == model_name:
+                return index
+            print(f"Post index in {directory} was built with {index.model_name}; starting a new one")
+        return cls(model_name)
+
+
+def _top_k(rows, sims, k):
+    if len(rows) > k:
+        top = np.argpartition(-sims, k - 1)[:k]
+        rows, sims = rows[top], sims[top]
+    order = np.argsort(-sims, kind="stable")
+    return rows[order], sims[order]
+
+
+def add_scrape_file(index, path, encode, subreddit=None):
+    """Embed the posts of one scrape file and add them; returns how many were new"""
+    from style_stats import iter_posts
+    subreddit = subreddit or os.path.splitext(os.path.basename(path))[0]
+    posts = [p for p in iter_posts(path) if p.get("post_id") not in index._seen_posts]
+    if not posts:
+        return 0
+    texts = [(p.get("title") or "") + " " + (p.get("selftext") or "") for p in posts]
+    return index.add(subreddit, [p["post_id"] for p in posts], encode(texts))
+
+
+if __name__ == "__main__":
+    import contextsubredditfinder as finder
+    index = PostIndex.load_or_create(finder.EMBEDDING_MODEL_NAME)
+    for path in sys.argv[1:]:
+        added = add_scrape_file(index, path, finder.encode_texts)
+        print(f"{path}: {added} new posts")
+    index.save()
+    print(f"Post index: {len(index)} posts from {len(index.subreddits)} subreddits, "
+          f"{'trained' if index.trained else 'exact search'}")
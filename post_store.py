@@ -0,0 +1,88 @@
+import json
+import os
+import sqlite3
+import time
+
+
+POST_STORE_PATH = os.path.join(".cache", "posts.sqlite")
+
+
+class PostStore:
+    """
+    Local SQLite store of scraped posts and comments, shared across subreddits.
+
+    Posts are keyed by post_id and comments by comment_id, each with its
+    created_utc. Alongside the record, a post keeps the num_comments and
+    edited values seen when its comments were last fetched, which is how the
+    scraper decides whether a rerun has to fetch the comment tree again.
+
+    The store may be opened on one thread and used from another (the
+    pipeline's scrape stage), but not from two threads at once.
+    """
+    def __init__(self, path=POST_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS posts ("
+            " post_id TEXT PRIMARY KEY, subreddit TEXT NOT NULL, created_utc TEXT NOT NULL,"
+            " num_comments INTEGER NOT NULL, edited REAL NOT NULL, record TEXT NOT NULL, scraped_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS posts_subreddit ON posts (subreddit);"
+            "CREATE TABLE IF NOT EXISTS comments ("
+            " comment_id TEXT PRIMARY KEY, post_id TEXT NOT NULL, created_utc TEXT NOT NULL,"
+            " position INTEGER NOT NULL, record TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS comments_post ON comments (post_id, position);"
+        )
+
+    def get_state(self, post_id):
+        """Return (num_comments, edited) recorded for a post, or None if unseen"""
+        row = self._conn.execute(
+            "SELECT num_comments, edited FROM posts WHERE post_id = ?", (post_id,)
+        ).fetchone()
+        return row
+
+    def get_post(self, post_id):
+        """Return the stored post record with its comments, or None"""
+        row = self._conn.execute("SELECT record FROM posts WHERE post_id = ?", (post_id,)).fetchone()
+        if row is None:
+            return None
+        post_data = json.loads(row[0])
+        post_data["comments_data"] = [
+            json.loads(record) for (record,) in self._conn.execute(
+                "SELECT record FROM comments WHERE post_id = ? ORDER BY position", (post_id,)
+            )
+        ]
+        return post_data
+
+    def put_post(self, subreddit, post_data, edited=0.0):
+        """Store a post and replace its comments"""
+        post_id = post_data["post_id"]
+        fields = {k: v for k, v in post_data.items() if k != "comments_data"}
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (post_id, subreddit, post_data["created_utc"], post_data["num_comments"],
+                 float(edited or 0.0), json.dumps(fields, ensure_ascii=False), time.time())
+            )
+            self._conn.execute("DELETE FROM comments WHERE post_id = ?", (post_id,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO comments VALUES (?, ?, ?, ?, ?)",
+                [(c["comment_id"], post_id, c["created_utc"], i, json.dumps(c, ensure_ascii=False))
+                 for i, c in enumerate(post_data["comments_data"])]
+            )
+
+    def update_fields(self, post_id, fields):
+        """Refresh listing fields (score, ratio, ...) of a stored post without touching comments"""
+        row = self._conn.execute("SELECT record FROM posts WHERE post_id = ?", (post_id,)).fetchone()
+        if row is None:
+            return
+        record = json.loads(row[0])
+        record.update({k: v for k, v in fields.items() if k != "comments_data"})
+        with self._conn:
+            self._conn.execute(
+                "UPDATE posts SET record = ?, scraped_at = ? WHERE post_id = ?",
+                (json.dumps(record, ensure_ascii=False), time.time(), post_id)
+            )
+
+    def close(self):
+        self._conn.close()
@@ -1,9 +1,18 @@
 import praw
 import json
+import os
+import re
 import time
-import random
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 
+import instrumentation
+from columnar_store import COLUMNAR_SUFFIX, save_columnar
+from post_store import POST_STORE_PATH, PostStore
+from reddit_clients import RedditClientPool
+
 # ---- CONFIGURATION ----
 REDDIT_CLIENT_ID = "placeholder"
 REDDIT_CLIENT_SECRET = "placeholder"
@@ -11,61 +20,533 @@ REDDIT_USER_AGENT = "placeholder"
 SUBREDDIT_NAME ="Recruitment"  # Change this to your target
 POSTS_LIMIT = 100  # Reddit/PRAW hard API limit per filter
 
+# "json" keeps everything in memory and writes subreddit_data.json at the end.
+# "jsonl" appends each post to JSONL_PATH as soon as it is scraped, skips posts
+# already in that file on rerun, and converts to subreddit_data.json at the end.
+# "columnar" writes COLUMNAR_PATH, a compact memory-mappable store (columnar_store.py)
+# that style_stats/ContentGen read like a JSON file.
+OUTPUT_FORMAT = "json"
+JSONL_PATH = "subreddit_data.jsonl"
+COLUMNAR_PATH = "subreddit_data.cols"
+JSONL_FLUSH_EVERY = 5  # Posts between flushes to disk
+JSONL_TAIL_BLOCK = 64 * 1024  # Bytes read at a time when looking for the last complete line
+
+# Records start with post_id (see build_post_fields), so resuming reads just that field
+_LEADING_POST_ID = re.compile(rb'^\{"post_id": ("(?:[^"\\]|\\.)*")')
+
+# Requests kept in reserve before pausing until Reddit's rate-limit window resets
+RATE_LIMIT_RESERVE = 10
+
+# Comment trees expanded concurrently, each worker on its own Reddit client;
+# all workers share one request budget
+COMMENT_WORKERS = 4
+# replace_more depth: None expands every MoreComments node, 0 keeps only the
+# initially loaded comments. Nodes hiding fewer than the threshold are skipped.
+REPLACE_MORE_LIMIT = None
+REPLACE_MORE_THRESHOLD = 0
+
+# Batch mode: scrape every subreddit listed here into BATCH_OUTPUT_DIR/<name>.json.
+# Posts and comments are kept in POST_STORE_PATH, so reruns only fetch comment
+# trees for posts that are new, edited, or have a changed comment count.
+SUBREDDIT_NAMES = []
+BATCH_OUTPUT_DIR = "scraped"
+
 # ---- INITIALIZE REDDIT INSTANCE ----
-reddit = praw.Reddit(
-    client_id=REDDIT_CLIENT_ID,
-    client_secret=REDDIT_CLIENT_SECRET,
-    user_agent=REDDIT_USER_AGENT
-)
+def make_reddit():
+    return praw.Reddit(
+        client_id=REDDIT_CLIENT_ID,
+        client_secret=REDDIT_CLIENT_SECRET,
+        user_agent=REDDIT_USER_AGENT
+    )
+
+
+reddit = make_reddit()
+
+
+class JsonlPostWriter:
+    """
+    Appends one JSON record per post and remembers which post_ids are
+    already on disk, so an interrupted scrape can resume where it stopped.
+    A partial last line left by a crash is dropped before appending.
+    Resuming reads the file line by line and only decodes each post_id, so
+    memory stays bounded by the longest record, not the file.
+    """
+    def __init__(self, path, flush_every=JSONL_FLUSH_EVERY):
+        self.path = path
+        self.flush_every = flush_every
+        self.seen_ids = set()
+        self._pending = 0
+        self._truncate_partial_line()
+        self.seen_ids.update(read_jsonl_post_ids(path))
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _truncate_partial_line(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            pos = end
+            # Walk back a block at a time to the last newline; everything after it is partial
+            while pos > 0:
+                start = max(0, pos - JSONL_TAIL_BLOCK)
+                f.seek(start)
+                block = f.read(pos - start)
+                newline = block.rfind(b"\n")
+                if newline != -1:
+                    cut = start + newline + 1
+                    break
+                pos = start
+            else:
+                cut = 0
+            if cut != end:
+                f.truncate(cut)
+
+    def write(self, post_data):
+        self._file.write(json.dumps(post_data, ensure_ascii=False) + "\n")
+        self.seen_ids.add(post_data["post_id"])
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_jsonl_post_ids(path):
+    """Yield the post_id of every complete record in a JSONL file, decoding only that field"""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            match = _LEADING_POST_ID.match(line)
+            if match is not None:
+                yield json.loads(match.group(1))
+                continue
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)["post_id"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+
+
+def read_jsonl_posts(path):
+    """Yield post records from a JSONL file, skipping a truncated last line"""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def jsonl_to_json(jsonl_path, json_path="subreddit_data.json"):
+    """Convert streamed JSONL output to the subreddit_data.json layout"""
+    count = 0
+    with open(json_path, "w", encoding="utf-8") as out:
+        out.write("[")
+        for record in read_jsonl_posts(jsonl_path):
+            out.write(",\n" if count else "\n")
+            out.write(json.dumps(record, indent=2, ensure_ascii=False))
+            count += 1
+        out.write("\n]" if count else "]")
+    print(f"Converted {count} posts from {jsonl_path} to {json_path}")
+    return count
+
+
+def build_post_fields(post):
+    """Post fields available from the listing alone, without comments"""
+    return {
+        "post_id": post.id,
+        "title": post.title,
+        "selftext": post.selftext,
+        "url": post.url,
+        "score": post.score,
+        "upvote_ratio": post.upvote_ratio,
+        "num_comments": post.num_comments,
+        "created_utc": datetime.fromtimestamp(post.created_utc).isoformat(),
+        "author": str(post.author),
+        "flair": post.link_flair_text,
+        "permalink": f"https://reddit.com{post.permalink}",
+        "comments_data": []
+    }
+
+
+def post_edited(post):
+    return float(getattr(post, "edited", False) or 0.0)
+
+
+def build_post_record(post):
+    post_data = build_post_fields(post)
+    for comment in post.comments.list():
+        post_data["comments_data"].append({
+            "comment_id": comment.id,
+            "parent_id": comment.parent_id,
+            "body": comment.body,
+            "author": str(comment.author),
+            "score": comment.score,
+            "created_utc": datetime.fromtimestamp(comment.created_utc).isoformat(),
+            "is_submitter": comment.is_submitter
+        })
+    return post_data
 
-def scrape_subreddit_top_posts(subreddit_name, posts_limit=1000):
+
+class RateLimitScheduler:
+    """
+    Paces scraping from the request budget PRAW reports in reddit.auth.limits.
+
+    After each post it projects the requests still needed this window, from
+    the current rate and the posts left. If the remaining budget covers that,
+    nobody waits;
+    otherwise the budget is spread evenly over the time left, and once it
+    drops to the reserve every worker waits for the window to reset. Workers
+    call wait_turn() before issuing requests, so the budget is shared.
+    Workers on their own clients register them with add_client(); they all
+    draw from the same window, so the freshest reading among them is used.
+    It also tracks throughput and per-post stage timings.
+    """
+    def __init__(self, reddit_client, reserve=RATE_LIMIT_RESERVE, clock=time.time, sleep=time.sleep):
+        self.reddit_client = reddit_client
+        self.clients = [reddit_client]
+        self.reserve = reserve
+        self.clock = clock
+        self.sleep = sleep
+        self.total_requests = 0
+        self.posts_done = 0
+        self.posts_started = 0
+        self.slept = 0.0
+        self.timings = []
+        self.expected_posts = None
+        self.started = clock()
+        self._resume_at = self.started
+        self._lock = threading.Lock()
+        self._last_used = self._limits().get("used")
+
+    def add_client(self, client):
+        with self._lock:
+            if not any(c is client for c in self.clients):
+                self.clients.append(client)
+
+    def _limits(self):
+        """
+        The latest reading of the shared window: every client reports the
+        headers of its own last response, and within a window the one with
+        the most requests used is the most recent.
+        """
+        now = self.clock()
+        latest = {}
+        for client in self.clients:
+            try:
+                limits = client.auth.limits or {}
+            except Exception:
+                continue
+            if limits.get("used") is None:
+                continue
+            reset_at = limits.get("reset_timestamp")
+            if reset_at is not None and reset_at <= now:
+                continue  # From a window that has ended
+            if not latest or limits["used"] > latest["used"]:
+                latest = limits
+        return latest
+
+    def _update_requests(self, limits):
+        used = limits.get("used")
+        if used is None:
+            return 0
+        if self._last_used is None or used < self._last_used:
+            delta = used  # First reading, or a new rate-limit window began
+        else:
+            delta = used - self._last_used
+        self._last_used = used
+        self.total_requests += delta
+        instrumentation.count("reddit.requests", delta)
+        return delta
+
+    def _projected_requests(self, at_current_rate):
+        """Requests still needed this window: the current rate, capped by the posts left"""
+        if self.expected_posts is None:
+            return at_current_rate
+        posts_left = max(self.expected_posts - self.posts_started, 0)
+        return min(at_current_rate, posts_left * self._requests_per_started_post())
+
+    def _requests_per_started_post(self):
+        # Requests from posts still in flight are already counted, so average over started posts
+        return self.total_requests / max(self.posts_started, 1)
+
+    def wait_turn(self):
+        """Sleep until the shared budget allows more requests"""
+        with self._lock:
+            self.posts_started += 1
+            delay = self._resume_at - self.clock()
+            if delay > 0:
+                self.slept += delay
+        if delay > 0:
+            instrumentation.add_time("reddit.rate_limit_wait", delay)
+            self.sleep(delay)
+
+    def post_done(self, post_started):
+        """Record a finished post and push back the next allowed start if needed"""
+        with self._lock:
+            limits = self._limits()
+            self._update_requests(limits)
+            self.posts_done += 1
+            requests_for_post = self._requests_per_started_post()
+
+            remaining = limits.get("remaining")
+            reset_at = limits.get("reset_timestamp")
+            if remaining is None or reset_at is None:
+                return
+            now = self.clock()
+            until_reset = max(0.0, reset_at - now)
+            post_seconds = max(now - post_started, 1e-3)
+            budget = remaining - self.reserve
+            if budget <= 0:
+                self._resume_at = max(self._resume_at, reset_at)
+            elif self._projected_requests(requests_for_post / post_seconds * until_reset) > budget:
+                # Spend this post's share of the budget no faster than the window allows
+                delay = until_reset / budget * max(requests_for_post, 1.0) - post_seconds
+                if delay > 0:
+                    self._resume_at = max(self._resume_at, now) + delay
+
+    def record_timing(self, post_id, listing, expand, serialize):
+        with self._lock:
+            self.timings.append({
+                "post_id": post_id,
+                "listing_fetch": listing,
+                "comment_expansion": expand,
+                "serialization": serialize,
+            })
+
+    def timing_summary(self):
+        stages = ["listing_fetch", "comment_expansion", "serialization"]
+        totals = {stage: sum(t[stage] for t in self.timings) for stage in stages}
+        count = max(len(self.timings), 1)
+        return ", ".join(f"{stage} {totals[stage]:.1f}s total / {totals[stage] / count:.2f}s avg" for stage in stages)
+
+    def posts_per_minute(self):
+        elapsed = self.clock() - self.started
+        return self.posts_done * 60 / elapsed if elapsed > 0 else 0.0
+
+    def requests_per_post(self):
+        return self.total_requests / self.posts_done if self.posts_done else 0.0
+
+
+def scrape_subreddit_top_posts(
+    subreddit_name,
+    posts_limit=1000,
+    writer=None,
+    reddit_client=None,
+    scheduler=None,
+    workers=COMMENT_WORKERS,
+    replace_more_limit=REPLACE_MORE_LIMIT,
+    replace_more_threshold=REPLACE_MORE_THRESHOLD,
+    store=None,
+    client_pool=None
+):
+    """
+    Scrape top posts of the year with their comment trees.
+
+    The listing is read once on this thread while comment trees for up to
+    `workers` posts are expanded concurrently. Records are emitted in listing
+    order. With a writer, each post is streamed to it as soon as it is
+    scraped, posts already written are skipped, and nothing is kept in memory.
+    With a PostStore, posts whose comment count and edit time are unchanged
+    are served from the store with refreshed listing fields, and every
+    freshly scraped post is saved to it.
+
+    PRAW clients must not be shared between threads, so each worker expands
+    comments on a client borrowed from client_pool (by default one pool of
+    make_reddit() clients). A caller-supplied reddit_client without a pool
+    is only used from this thread, one post at a time.
+    """
+    client = reddit_client or reddit
+    scheduler = scheduler or RateLimitScheduler(client)
+    if client_pool is None and reddit_client is None:
+        client_pool = RedditClientPool(make_reddit)
+    if client_pool is None:
+        workers = 1
+    scheduler.expected_posts = scheduler.posts_started + posts_limit
     posts_all = []
-    subreddit = reddit.subreddit(subreddit_name)
+    subreddit = client.subreddit(subreddit_name)
     print(f"Accessing subreddit '{subreddit_name}' for top posts...")
-    print(f"Parameters: time_filter='year', limit={posts_limit}")
-    for post in subreddit.top(time_filter="year", limit=posts_limit):
-        post.comments.replace_more(limit=None)
-        post_data = {
-            "post_id": post.id,
-            "title": post.title,
-            "selftext": post.selftext,
-            "url": post.url,
-            "score": post.score,
-            "upvote_ratio": post.upvote_ratio,
-            "num_comments": post.num_comments,
-            "created_utc": datetime.fromtimestamp(post.created_utc).isoformat(),
-            "author": str(post.author),
-            "flair": post.link_flair_text,
-            "permalink": f"https://reddit.com{post.permalink}",
-            "comments_data": []
-        }
-        for comment in post.comments.list():
-            post_data["comments_data"].append({
-                "comment_id": comment.id,
-                "parent_id": comment.parent_id,
-                "body": comment.body,
-                "author": str(comment.author),
-                "score": comment.score,
-                "created_utc": datetime.fromtimestamp(comment.created_utc).isoformat(),
-                "is_submitter": comment.is_submitter
-            })
-        posts_all.append(post_data)
-        # ---- RANDOM DELAY BETWEEN POSTS ----
-        sleep_time = random.uniform(0.5, 1.5)
-        time.sleep(sleep_time)
+    print(f"Parameters: time_filter='year', limit={posts_limit}, workers={workers}, "
+          f"replace_more limit={replace_more_limit} threshold={replace_more_threshold}")
+
+    reused = 0
 
-        for idx, post in enumerate(subreddit.top(time_filter="year", limit=posts_limit), 1):
-            print(f"[{idx}/{posts_limit}] Scraped post: {post.title[:40]}")
+    def emit(idx, post, future, listing_time):
+        post_data, expand_time, build_time = future.result()
+        write_started = time.perf_counter()
+        if store is not None and expand_time is not None:
+            store.put_post(subreddit_name, post_data, post_edited(post))
+        if writer is not None:
+            writer.write(post_data)
+        else:
+            posts_all.append(post_data)
+        serialize_time = build_time + time.perf_counter() - write_started
+        scheduler.record_timing(post.id, listing_time, expand_time or 0.0, serialize_time)
+        instrumentation.add_time("posts.serialize", serialize_time)
+        instrumentation.count("posts.scraped" if expand_time is not None else "posts.reused")
+        status = "Scraped" if expand_time is not None else "Unchanged"
+        print(
+            f"[{idx}/{posts_limit}] {status} post: {post.title[:40]} "
+            f"({scheduler.posts_per_minute():.1f} posts/min, {scheduler.requests_per_post():.1f} requests/post)"
+        )
 
+    def expand(post):
+        scheduler.wait_turn()
+        post_started = scheduler.clock()
+        expand_started = time.perf_counter()
+        with instrumentation.timer("reddit.replace_more"):
+            post.comments.replace_more(limit=replace_more_limit, threshold=replace_more_threshold)
+        build_started = time.perf_counter()
+        post_data = build_post_record(post)
+        build_done = time.perf_counter()
+        scheduler.post_done(post_started)
+        return post_data, build_started - expand_started, build_done - build_started
 
+    def work(post):
+        worker_client = client_pool.acquire()
+        scheduler.add_client(worker_client)
+        try:
+            # Re-bind the listed post to this worker's client; fetching its comments costs the same request
+            return expand(worker_client.submission(id=post.id))
+        finally:
+            client_pool.release(worker_client)
+
+    in_flight = deque()
+    workers = max(1, workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        listing = iter(subreddit.top(time_filter="year", limit=posts_limit))
+        idx = 0
+        while True:
+            fetch_started = time.perf_counter()
+            post = next(listing, None)
+            listing_time = time.perf_counter() - fetch_started
+            instrumentation.add_time("reddit.listing", listing_time)
+            if post is None:
+                break
+            idx += 1
+            if writer is not None and post.id in writer.seen_ids:
+                print(f"[{idx}/{posts_limit}] Skipping already scraped post: {post.title[:40]}")
+                continue
+            if store is not None and store.get_state(post.id) == (post.num_comments, post_edited(post)):
+                build_started = time.perf_counter()
+                store.update_fields(post.id, build_post_fields(post))
+                cached = Future()
+                cached.set_result((store.get_post(post.id), None, time.perf_counter() - build_started))
+                in_flight.append((idx, post, cached, listing_time))
+                scheduler.expected_posts -= 1
+                reused += 1
+                continue
+            if client_pool is None:
+                future = Future()
+                future.set_result(expand(post))
+            else:
+                future = pool.submit(work, post)
+            in_flight.append((idx, post, future, listing_time))
+            while len(in_flight) >= workers * 2:
+                emit(*in_flight.popleft())
+        while in_flight:
+            emit(*in_flight.popleft())
+
+    print(
+        f"Scraped {scheduler.posts_done} posts with {scheduler.total_requests} requests, "
+        f"{scheduler.slept:.1f}s of worker time spent waiting on the rate limit"
+    )
+    if store is not None:
+        print(f"Reused {reused} unchanged posts from {store.path}")
+    print(f"Per-post timings: {scheduler.timing_summary()}")
     return posts_all
 
-def save_to_json(data, subreddit_name):
-    filename = f"subreddit_data.json"
+def save_to_json(data, subreddit_name, filename="subreddit_data.json"):
     with open(filename, "w", encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
     print(f"Saved {len(data)} posts to {filename}")
 
+
+def save_to_columnar(data, subreddit_name, path=COLUMNAR_PATH):
+    save_columnar(data, path)
+    print(f"Saved {len(data)} posts to {path}")
+
+
+def scrape_subreddits(
+    subreddit_names,
+    posts_limit=POSTS_LIMIT,
+    output_dir=BATCH_OUTPUT_DIR,
+    store=None,
+    reddit_client=None,
+    workers=COMMENT_WORKERS,
+    output_format=OUTPUT_FORMAT,
+    client_pool=None
+):
+    """
+    Scrape several subreddits into output_dir/<name>.json (or <name>.cols
+    for the columnar format), sharing one rate-limit budget and one
+    PostStore. Returns {name: output path} for the subreddits that succeeded.
+    """
+    client = reddit_client or reddit
+    scheduler = RateLimitScheduler(client)
+    if client_pool is None and reddit_client is None:
+        client_pool = RedditClientPool(make_reddit)
+    own_store = store is None
+    store = store or PostStore(POST_STORE_PATH)
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = {}
+    try:
+        for name in subreddit_names:
+            print(f"\n=== r/{name} ===")
+            try:
+                posts = scrape_subreddit_top_posts(
+                    name, posts_limit, reddit_client=client, scheduler=scheduler, workers=workers, store=store,
+                    client_pool=client_pool
+                )
+            except Exception as e:
+                print(f"Error scraping r/{name}: {e}")
+                continue
+            if output_format == "columnar":
+                path = os.path.join(output_dir, name + COLUMNAR_SUFFIX)
+                save_to_columnar(posts, name, path)
+            else:
+                path = os.path.join(output_dir, f"{name}.json")
+                save_to_json(posts, name, filename=path)
+            outputs[name] = path
+    finally:
+        if own_store:
+            store.close()
+    return outputs
+
 if __name__ == "__main__":
-    posts = scrape_subreddit_top_posts(SUBREDDIT_NAME, POSTS_LIMIT)
-    save_to_json(posts, SUBREDDIT_NAME)
+    if SUBREDDIT_NAMES:
+        scrape_subreddits(SUBREDDIT_NAMES, POSTS_LIMIT)
+    elif OUTPUT_FORMAT == "jsonl":
+        with JsonlPostWriter(JSONL_PATH) as writer:
+            if writer.seen_ids:
+                print(f"Resuming: {len(writer.seen_ids)} posts already in {JSONL_PATH}")
+            scrape_subreddit_top_posts(SUBREDDIT_NAME, POSTS_LIMIT, writer=writer)
+        jsonl_to_json(JSONL_PATH)
+    elif OUTPUT_FORMAT == "columnar":
+        posts = scrape_subreddit_top_posts(SUBREDDIT_NAME, POSTS_LIMIT)
+        save_to_columnar(posts, SUBREDDIT_NAME)
+    else:
+        posts = scrape_subreddit_top_posts(SUBREDDIT_NAME, POSTS_LIMIT)
+        save_to_json(posts, SUBREDDIT_NAME)
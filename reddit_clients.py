@@ -0,0 +1,35 @@
+import threading
+
+
+class RedditClientPool:
+    """
+    Reddit clients for worker threads. PRAW is not thread-safe (its session
+    and rate limiter are shared mutable state), so a worker borrows a client
+    of its own for each task and returns it afterwards. Clients are created
+    by factory on demand, at most one per concurrent worker, and reused
+    across tasks and runs so they don't re-authenticate every time.
+
+    All clients with the same credentials draw from one Reddit rate-limit
+    window; RateLimitScheduler combines what they report.
+    """
+    def __init__(self, factory):
+        self.factory = factory
+        self.clients = []
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        client = self.factory()
+        with self._lock:
+            self.clients.append(client)
+        return client
+
+    def release(self, client):
+        with self._lock:
+            self._idle.append(client)
+
+    def __len__(self):
+        return len(self.clients)
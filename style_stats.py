@@ -0,0 +1,208 @@
+import json
+import re
+from collections import Counter
+
+import nltk
+
+import instrumentation
+from columnar_store import is_columnar, iter_columnar_posts
+
+
+MAX_TRACKED_TERMS = 50000  # Per counter; older rare terms are pruned beyond twice this
+JSON_CHUNK_SIZE = 1 << 20
+
+BULLET_RE = re.compile(r"^\s*[-*]", re.MULTILINE)
+
+
+class StyleStats:
+    """
+    Style statistics for a set of posts, computed in one streaming pass.
+
+    Every field is a sum or a counter, so stats for separate files or
+    subreddits can be combined with merge() without rescanning, and saved
+    with to_dict() / from_dict(). Word and bigram counters keep at most
+    2 * max_terms entries; beyond that the rarest are dropped, so counts for
+    the top terms stay exact on realistic data while memory stays bounded.
+    """
+    def __init__(self, max_terms=MAX_TRACKED_TERMS):
+        self.max_terms = max_terms
+        self.posts = 0
+        self.title_words = 0
+        self.body_words = 0
+        self.question_titles = 0
+        self.bullet_bodies = 0
+        self.comments = 0
+        self.comment_words = 0
+        self.question_comments = 0
+        self.bigrams = Counter()
+        self.words = Counter()
+        self._stop_words = None
+
+    def _stopwords(self):
+        if self._stop_words is None:
+            self._stop_words = set(nltk.corpus.stopwords.words('english'))
+        return self._stop_words
+
+    def add_post(self, post):
+        title = post.get('title') or ''
+        # The scraper writes the body as selftext; older files used body
+        body = post.get('selftext') or post.get('body') or ''
+        self.posts += 1
+
+        if title:
+            self.title_words += len(title.split())
+            if '?' in title:
+                self.question_titles += 1
+            tokens = nltk.word_tokenize(title.lower())
+            self.bigrams.update(nltk.bigrams(tokens))
+            stop_words = self._stopwords()
+            self.words.update(w for w in tokens if w.isalpha() and w not in stop_words)
+            self._prune()
+
+        if body:
+            self.body_words += len(body.split())
+            if BULLET_RE.search(body):
+                self.bullet_bodies += 1
+
+        for comment in post.get('comments_data') or ():
+            text = comment.get('body') or ''
+            self.comments += 1
+            self.comment_words += len(text.split())
+            if '?' in text:
+                self.question_comments += 1
+        return self
+
+    def _prune(self):
+        for counter in (self.bigrams, self.words):
+            if len(counter) > 2 * self.max_terms:
+                kept = counter.most_common(self.max_terms)
+                counter.clear()
+                counter.update(dict(kept))
+
+    def add_posts(self, posts):
+        for post in posts:
+            self.add_post(post)
+        return self
+
+    def merge(self, other):
+        """Add another StyleStats into this one"""
+        for field in ("posts", "title_words", "body_words", "question_titles", "bullet_bodies",
+                      "comments", "comment_words", "question_comments"):
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        self.bigrams.update(other.bigrams)
+        self.words.update(other.words)
+        self._prune()
+        return self
+
+    def to_dict(self):
+        return {
+            "posts": self.posts,
+            "title_words": self.title_words,
+            "body_words": self.body_words,
+            "question_titles": self.question_titles,
+            "bullet_bodies": self.bullet_bodies,
+            "comments": self.comments,
+            "comment_words": self.comment_words,
+            "question_comments": self.question_comments,
+            "bigrams": [[a, b, n] for (a, b), n in self.bigrams.most_common(self.max_terms)],
+            "words": self.words.most_common(self.max_terms),
+        }
+
+    @classmethod
+    def from_dict(cls, data, max_terms=MAX_TRACKED_TERMS):
+        stats = cls(max_terms)
+        for field in ("posts", "title_words", "body_words", "question_titles", "bullet_bodies",
+                      "comments", "comment_words", "question_comments"):
+            setattr(stats, field, data.get(field, 0))
+        stats.bigrams.update({(a, b): n for a, b, n in data.get("bigrams", [])})
+        stats.words.update(dict(data.get("words", [])))
+        return stats
+
+    def summary(self):
+        """The style summary block used in the generation prompt"""
+        posts = max(self.posts, 1)
+        return f"""
+- Average title length: {self.title_words / posts:.1f} words
+- Average body length: {self.body_words / posts:.1f} words
+- Most common bigrams in titles: {self.bigrams.most_common(10)}
+- Most common words: {self.words.most_common(10)}
+- About {self.question_titles}/{self.posts} titles include a question
+- {self.bullet_bodies} posts have bullet-point lists in body
+- Average comment length: {self.comment_words / max(self.comments, 1):.1f} words over {self.comments / posts:.1f} comments per post
+- {self.question_comments}/{self.comments} comments ask a question
+"""
+
+
+def iter_posts(path):
+    """Yield posts one at a time from a JSON array file, a JSONL file or a columnar store"""
+    if is_columnar(path):
+        yield from iter_columnar_posts(path)
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_array(f)
+
+
+def _iter_json_array(f, chunk_size=JSON_CHUNK_SIZE):
+    """Decode a top-level JSON array element by element without loading the file"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    started = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                return
+            fill()
+            continue
+        if not started:
+            if buffer[pos] != '[':
+                raise ValueError("Expected a JSON array of posts")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        pos = end
+        yield item
+
+
+def analyze_file(path, max_terms=MAX_TRACKED_TERMS):
+    """Compute StyleStats for one scrape file in a single streaming pass"""
+    with instrumentation.timer("style.analyze"):
+        stats = StyleStats(max_terms).add_posts(iter_posts(path))
+    instrumentation.count("style.posts", stats.posts)
+    instrumentation.count("style.comments", stats.comments)
+    return stats
+
+
+def analyze_files(paths, max_terms=MAX_TRACKED_TERMS):
+    """Compute StyleStats per file and merge them"""
+    combined = StyleStats(max_terms)
+    for path in paths:
+        combined.merge(analyze_file(path, max_terms))
+    return combined
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+import instrumentation
+
+
+SUBREDDIT_INDEX_PATH = os.path.join(".cache", "subreddit_index.sqlite")
+SUBREDDIT_MAX_AGE = 24 * 3600  # Seconds before a subreddit's recent posts are fetched again
+SEARCH_MAX_AGE = 6 * 3600  # Seconds before a keyword search is repeated
+
+
+class SubredditIndex:
+    """
+    Persistent SQLite index of subreddits seen by the finder, shared across runs.
+
+    Per subreddit it stores the text of the recent posts, their embeddings
+    (for one embedding model), when they were fetched, and the outcome of the
+    last relevance check: keyword-matching posts, relevant posts, total posts
+    and ratio. A later run with different keywords re-scores the stored
+    embeddings against its own keyword embeddings and only goes back to
+    Reddit for entries older than max_age. Keyword searches are cached the
+    same way, as the ordered (post id, subreddit) pairs they returned.
+    """
+    def __init__(self, model_name, path=SUBREDDIT_INDEX_PATH, max_age=SUBREDDIT_MAX_AGE, search_max_age=SEARCH_MAX_AGE):
+        self.model_name = model_name
+        self.path = path
+        self.max_age = max_age
+        self.search_max_age = search_max_age
+        self.hits = 0
+        self.misses = 0
+        self.search_hits = 0
+        self.search_misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS subreddits ("
+                " name TEXT PRIMARY KEY, model TEXT NOT NULL, fetched_at REAL NOT NULL,"
+                " texts TEXT NOT NULL, dim INTEGER NOT NULL, embeddings BLOB NOT NULL,"
+                " keyword_hits INTEGER, relevant INTEGER, total INTEGER, ratio REAL,"
+                " keywords_key TEXT, scored_at REAL);"
+                "CREATE TABLE IF NOT EXISTS searches ("
+                " keyword TEXT NOT NULL, max_posts INTEGER NOT NULL, fetched_at REAL NOT NULL,"
+                " results TEXT NOT NULL, PRIMARY KEY (keyword, max_posts));"
+            )
+        return self._conn
+
+    @staticmethod
+    def keywords_key(keywords):
+        return hashlib.sha256(json.dumps(sorted(keywords)).encode("utf-8")).hexdigest()
+
+    def get(self, subreddit):
+        """Return (texts, embeddings) for a fresh entry, or None if missing or stale"""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT model, fetched_at, texts, dim, embeddings FROM subreddits WHERE name = ?",
+                (subreddit.lower(),)
+            ).fetchone()
+            fresh = row is not None and row[0] == self.model_name and time.time() - row[1] <= self.max_age
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        instrumentation.count("subreddit_index.hits" if fresh else "subreddit_index.misses")
+        if not fresh:
+            return None
+        texts = json.loads(row[2])
+        embeddings = np.frombuffer(row[4], dtype=np.float32).reshape(len(texts), row[3])
+        return texts, embeddings
+
+    def put(self, subreddit, texts, embeddings):
+        """Store freshly fetched posts and their embeddings, clearing the old score"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2:
+            embeddings = embeddings.reshape(len(texts), -1)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO subreddits (name, model, fetched_at, texts, dim, embeddings)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (subreddit.lower(), self.model_name, time.time(), json.dumps(texts, ensure_ascii=False),
+                 embeddings.shape[1], embeddings.tobytes())
+            )
+            conn.commit()
+
+    def record_score(self, subreddit, keywords, keyword_hits, relevant, total):
+        """Remember the outcome of the latest relevance check for a subreddit"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "UPDATE subreddits SET keyword_hits = ?, relevant = ?, total = ?, ratio = ?,"
+                " keywords_key = ?, scored_at = ? WHERE name = ?",
+                (keyword_hits, relevant, total, relevant / total if total else 0.0,
+                 self.keywords_key(keywords), time.time(), subreddit.lower())
+            )
+            conn.commit()
+
+    def get_score(self, subreddit):
+        """Return the last recorded score as a dict, or None"""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT keyword_hits, relevant, total, ratio, keywords_key, scored_at FROM subreddits"
+                " WHERE name = ? AND scored_at IS NOT NULL",
+                (subreddit.lower(),)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("keyword_hits", "relevant", "total", "ratio", "keywords_key", "scored_at"), row))
+
+    def get_search(self, keyword, max_posts):
+        """Return cached [(post_id, subreddit), ...] for a keyword search, or None if stale"""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT fetched_at, results FROM searches WHERE keyword = ? AND max_posts = ?",
+                (keyword.lower(), max_posts)
+            ).fetchone()
+            fresh = row is not None and time.time() - row[0] <= self.search_max_age
+            if fresh:
+                self.search_hits += 1
+            else:
+                self.search_misses += 1
+        instrumentation.count("search_cache.hits" if fresh else "search_cache.misses")
+        if not fresh:
+            return None
+        return [tuple(pair) for pair in json.loads(row[1])]
+
+    def put_search(self, keyword, max_posts, results):
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?)",
+                (keyword.lower(), max_posts, time.time(), json.dumps(list(results)))
+            )
+            conn.commit()
+
+    def report(self):
+        return (f"Subreddit index: {self.hits} fresh, {self.misses} fetched; "
+                f"keyword searches: {self.search_hits} cached, {self.search_misses} fetched")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
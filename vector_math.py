@@ -0,0 +1,11 @@
+import numpy as np
+
+
+def normalize_rows(matrix):
+    """Rows scaled to unit length as float32 (zero rows stay zero); a single vector becomes one row"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[np.newaxis, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
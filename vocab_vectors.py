@@ -0,0 +1,79 @@
+import json
+import os
+
+import numpy as np
+
+import instrumentation
+from vector_math import normalize_rows
+
+
+VOCAB_CACHE_DIR = ".cache"
+MIN_WORD_PROB = -15
+
+
+class VocabVectors:
+    """
+    Normalized word vectors for the filtered spaCy vocabulary.
+
+    The matrix is built once from the pipeline's vocab and saved as a .npy
+    file plus a JSON word list, so later runs memory-map it instead of
+    walking nlp.vocab. Similar words for all keywords come from one matrix
+    multiply.
+    """
+    def __init__(self, words, vectors):
+        self.words = words
+        self.vectors = vectors
+
+    @classmethod
+    def build(cls, nlp, min_prob=MIN_WORD_PROB):
+        words = []
+        vectors = []
+        for lex in nlp.vocab:
+            if lex.has_vector and lex.is_lower and lex.prob >= min_prob:
+                words.append(lex.text)
+                vectors.append(lex.vector)
+        if not vectors:
+            return cls([], np.zeros((0, nlp.vocab.vectors_length), dtype=np.float32))
+        return cls(words, normalize_rows(np.vstack(vectors)))
+
+    @staticmethod
+    def cache_paths(nlp, cache_dir=VOCAB_CACHE_DIR, min_prob=MIN_WORD_PROB):
+        meta = nlp.meta
+        stem = f"vocab_{meta.get('lang', 'xx')}_{meta.get('name', 'model')}_{meta.get('version', '0')}_p{min_prob}"
+        base = os.path.join(cache_dir, stem)
+        return base + ".npy", base + ".json"
+
+    def save(self, vectors_path, words_path):
+        os.makedirs(os.path.dirname(vectors_path) or ".", exist_ok=True)
+        np.save(vectors_path, np.ascontiguousarray(self.vectors, dtype=np.float32))
+        with open(words_path, "w", encoding="utf-8") as f:
+            json.dump(self.words, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, vectors_path, words_path):
+        with open(words_path, "r", encoding="utf-8") as f:
+            words = json.load(f)
+        return cls(words, np.load(vectors_path, mmap_mode="r"))
+
+    @classmethod
+    def load_or_build(cls, nlp, cache_dir=VOCAB_CACHE_DIR, min_prob=MIN_WORD_PROB):
+        """Memory-map the cached matrix for this pipeline, building it on first use"""
+        vectors_path, words_path = cls.cache_paths(nlp, cache_dir, min_prob)
+        if os.path.exists(vectors_path) and os.path.exists(words_path):
+            with instrumentation.timer("spacy.vocab_load"):
+                return cls.load(vectors_path, words_path)
+        with instrumentation.timer("spacy.vocab_scan"):
+            vocab = cls.build(nlp, min_prob)
+        vocab.save(vectors_path, words_path)
+        print(f"Cached {len(vocab.words)} vocab vectors to {vectors_path}")
+        return vocab
+
+    def similar_words(self, query_vectors, sim_threshold):
+        """
+        Return, for each query vector, the words with similarity above
+        sim_threshold, in vocab order (the order nlp.vocab yields them).
+        """
+        if not self.words:
+            return [[] for _ in query_vectors]
+        sims = normalize_rows(np.asarray(query_vectors, dtype=np.float32)) @ np.asarray(self.vectors).T
+        return [[self.words[i] for i in np.flatnonzero(row > sim_threshold)] for row in sims]